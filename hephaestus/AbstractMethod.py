@@ -1,16 +1,89 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: nbs/02_AbstractMethod.ipynb (unless otherwise specified).
 
-__all__ = ['AbstractMethod']
+__all__ = ['TokenVocabulary', 'SHARED_VOCABULARY', 'AbstractMethod', 'EditScript', 'EditScriptTable']
 
 # Cell
 #hide
-from typing import Union, List
+from typing import Union, List, Optional, Iterator, Iterable, Sequence, Tuple, Type
+from array import array
+import threading
+
+import numpy as np
 
 import sys
 sys.path.append("..")
 
 from .EditOperations import *
 
+# Cell
+class TokenVocabulary:
+    """
+    Assigns an integer ID to each distinct token, in the order in which the tokens are first seen. The `tokens` given
+    on creation are assigned IDs right away. AbstractMethods store the IDs of their tokens rather than the tokens
+    themselves, so each distinct token is only stored once no matter how many AbstractMethods contain it. Tokens can
+    be added by several threads at once.
+    """
+
+    def __init__(self, tokens: Iterable[str] = ()) -> None:
+        self.__ids = {}
+        self.__tokens = []
+        self.__lock = threading.Lock()
+        self.getIds(tokens)
+
+    def __reduce__(self) -> tuple:
+        # the lock can't be pickled, but the tokens are enough to assign the same IDs again
+        return (TokenVocabulary, (list(self.__tokens),))
+
+    def __len__(self) -> int:
+        return len(self.__tokens)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.__ids
+
+    def getId(self, token: str) -> int:
+        """
+        Returns the ID of the given `token`. If the token has not been seen before, it is assigned the next free ID.
+        """
+
+        tokenId = self.__ids.get(token)
+        if tokenId is not None:
+            return tokenId
+
+        # Only new tokens need the lock. The token is stored before its ID is, so that a thread which finds the ID
+        # without the lock can always look up the token.
+        with self.__lock:
+            tokenId = self.__ids.get(token)
+            if tokenId is None:
+                tokenId = len(self.__tokens)
+                self.__tokens.append(token)
+                self.__ids[token] = tokenId
+
+        return tokenId
+
+    def getIds(self, tokens: Iterable[str]) -> array:
+        """
+        Returns an array of the IDs of the given `tokens`, as in `getId`.
+        """
+        ids = self.__ids
+        return array("I", [ids[token] if token in ids else self.getId(token) for token in tokens])
+
+    def getToken(self, tokenId: int) -> str:
+        """
+        Returns the token with the given `tokenId`.
+        """
+        return self.__tokens[tokenId]
+
+    def getTokens(self, tokenIds: Iterable[int]) -> List[str]:
+        """
+        Returns the list of tokens with the given `tokenIds`.
+        """
+        tokens = self.__tokens
+        return [tokens[tokenId] for tokenId in tokenIds]
+
+# Cell
+# vocabulary used by all AbstractMethods which are not given a vocabulary of their own
+SHARED_VOCABULARY = TokenVocabulary()
+
 # Cell
 class AbstractMethod:
     """
@@ -20,114 +93,819 @@ class AbstractMethod:
     - a list of tokens
 
     Note that empty tokens are ignored.
+
+    Tokens are stored compactly as integer IDs of the given `vocabulary`, which defaults to `SHARED_VOCABULARY`.
+    AbstractMethods are hashable, so they can be used as dictionary keys or in sets; however, an `AbstractMethod`
+    should not be modified while it is used as such.
     """
 
-    def __init__(self, tokens: Union[str, List[str]], delimiter: str = " ") -> None:
+    __slots__ = ("__vocabulary", "__tokenIds", "__hash")
+
+    def __init__(
+        self,
+        tokens: Union[str, List[str]],
+        delimiter: str = " ",
+        vocabulary: Optional[TokenVocabulary] = None
+    ) -> None:
 
         if type(tokens) is str:
-            self.__tokens = [] if len(tokens) == 0 else tokens.split(delimiter)
-        else:
-            self.__tokens = tokens.copy()
+            tokens = [] if len(tokens) == 0 else tokens.split(delimiter)
 
-        # remove empty tokens
-        self.__tokens = [token for token in self.__tokens if token != ""]
+        # remove empty tokens, then store the IDs of the remaining ones
+        self.__vocabulary = SHARED_VOCABULARY if vocabulary is None else vocabulary
+        self.__tokenIds = self.__vocabulary.getIds(token for token in tokens if token != "")
+        self.__hash = None
 
     def __eq__(self, other: "AbstractMethod") -> bool:
-        return type(other) is AbstractMethod and self.__tokens == other.__tokens
 
-    def __getitem__(self, key: int) -> str:
-        return self.__tokens[key]
+        if type(other) is not AbstractMethod:
+            return False
+
+        # token IDs can only be compared directly if both methods use the same vocabulary
+        if self.__vocabulary is other.__vocabulary:
+            return self.__tokenIds == other.__tokenIds
+
+        return self.getTokens() == other.getTokens()
+
+    def __hash__(self) -> int:
+
+        # hash the tokens rather than their IDs so that equal methods with different vocabularies have equal hashes
+        if self.__hash is None:
+            self.__hash = hash(tuple(self.getTokens()))
+
+        return self.__hash
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[str, List[str]]:
+
+        if type(key) is slice:
+            return self.__vocabulary.getTokens(self.__tokenIds[key])
+
+        return self.__vocabulary.getToken(self.__tokenIds[key])
 
     def __len__(self) -> int:
-        return len(self.__tokens)
+        return len(self.__tokenIds)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.getTokens())
 
     def __str__(self) -> str:
-        return repr(" ".join(self.__tokens))[1:-1]
+        return repr(" ".join(self.getTokens()))[1:-1]
 
     def __repr__(self) -> str:
         return str(self)
 
+    def __copy__(self) -> "AbstractMethod":
+        # token IDs are never modified in place, so they can be shared by the copy
+        return self.__withTokenIds(self.__tokenIds)
+
+    def __deepcopy__(self, memo: dict) -> "AbstractMethod":
+        # the vocabulary is shared by many methods, so it must not be copied
+        return self.__copy__()
+
+    def __reduce__(self) -> tuple:
+        # pickle the tokens rather than their IDs, which are only meaningful with respect to the vocabulary in this process
+        return (AbstractMethod, (self.getTokens(),))
+
+    def FromTokenIds(tokenIds: Sequence[int], vocabulary: TokenVocabulary) -> "AbstractMethod":
+        """
+        Returns an `AbstractMethod` whose tokens are given by their `tokenIds` in the given `vocabulary`. The
+        `tokenIds` are not copied, so they can be a view into a larger buffer such as a `memoryview` of unsigned
+        integers. They are never modified; applying edit operations replaces them with a new array instead.
+        """
+
+        method = object.__new__(AbstractMethod)
+        method.__vocabulary = vocabulary
+        method.__tokenIds = tokenIds
+        method.__hash = None
+
+        return method
+
+    def getTokens(self) -> List[str]:
+        """
+        Returns the list of tokens.
+        """
+        return self.__vocabulary.getTokens(self.__tokenIds)
+
+    def getTokenIds(self) -> Sequence[int]:
+        """
+        Returns the IDs of the tokens in the vocabulary returned by `getVocabulary`. The IDs must not be modified.
+        """
+        return self.__tokenIds
+
+    def getVocabulary(self) -> TokenVocabulary:
+        """
+        Returns the `TokenVocabulary` of the tokens.
+        """
+        return self.__vocabulary
+
     def applyEditOperation(self, operation: EditOperation):
         """
         Applies the given `operation`.
         """
-        operation.applyToTokens(self.__tokens)
+        self.applyEditOperations([operation])
 
     def applyEditOperations(self, operations: List[EditOperation]):
         """
-        Applies the given list of `operations` in order.
+        Applies the given list of `operations` in order, as by an `EditScript`. If any of the operations affects
+        tokens which are out of bounds, raises an `IndexError` and leaves the `AbstractMethod` unchanged.
         """
-        for op in operations:
-            self.applyEditOperation(op)
+        self.__tokenIds = EditScript(operations).apply(self).__tokenIds
+        self.__hash = None
 
-    def getEditDistanceTo(self, other: "AbstractMethod") -> int:
+    def getEditDistanceTo(
+        self,
+        other: "AbstractMethod",
+        engine: str = "bitparallel",
+        maxDistance: Optional[int] = None
+    ) -> int:
         """
-        Returns the Levenshtein edit distance to the `AbstractMethod` given by `other`.
+        Returns the Levenshtein edit distance to the `AbstractMethod` given by `other`. The distance is computed
+        with the given `engine`, which can be `"bitparallel"` or any of the engines described in
+        `getEditOperationsTo`:
+        - `"bitparallel"`: The distance is computed with Myers' bit-parallel algorithm, which never builds the
+          Levenshtein matrix. It uses memory linear in the method lengths and processes one token of `other` per
+          step for all tokens of this `AbstractMethod` at once. This is the default behavior.
+
+        If only distances up to some bound are of interest, then provide that bound as `maxDistance`. In this case,
+        `engine` is not used; instead, only the cells of the Levenshtein matrix which are at most `maxDistance`
+        diagonals away from the main diagonal are computed (Ukkonen's algorithm), one row at a time. As soon as the
+        distance is known to be greater than `maxDistance`, `maxDistance + 1` is returned; this is immediately the case
+        if the lengths of both methods differ by more than `maxDistance`.
         """
-        return self.__getEditOpsMatrix(other)[-1][-1]
 
-    def getEditOperationsTo(self, other: "AbstractMethod") -> List[Union[InsertOperation, DeleteOperation, ReplaceOperation]]:
+        other = self.__getInVocabulary(other)
+
+        if maxDistance is not None:
+            return self.__getEditDistanceBanded(other, maxDistance)
+
+        if engine == "bitparallel":
+            return self.__getEditDistanceBitParallel(other)
+
+        return int(self.__getEditOpsMatrix(other, engine)[-1][-1])
+
+    def getEditOperationsTo(
+        self,
+        other: "AbstractMethod",
+        engine: str = "python",
+        hirschbergThreshold: int = 1000000
+    ) -> List[Union[InsertOperation, DeleteOperation, ReplaceOperation]]:
         """
         Returns the minimal list of basic edit operations (no CompoundOperations), which if applied, would
         result in the `AbstractMethod` given by `other`. The length of the returned list is the Levenshtein
         distance to `other`.
+
+        The Levenshtein matrix is computed with the given `engine`, which can be one of the following:
+        - `"python"`: The matrix is computed cell by cell in pure Python. This is the default behavior.
+        - `"numpy"`: The matrix is computed row by row with NumPy arrays of token IDs, which is much faster for long
+          methods. The returned operations are exactly the same as with `"python"`.
+
+        The Levenshtein matrix takes memory proportional to the product of the lengths of both methods. If it would
+        have more than `hirschbergThreshold` cells (defaults to 1,000,000), then Hirschberg's algorithm is used
+        instead: this method is recursively split in half, and `other` is split wherever the total distance of both
+        halves is minimal, until the matrices of the halves are small enough. This only takes memory linear in the
+        lengths of both methods. The returned operations are still minimal and deterministic, but they may differ from
+        the operations which would be obtained from the full matrix.
+
+        Tokens which both methods share at their beginning and at their end are never affected by the returned
+        operations, so the Levenshtein matrix is only built for the tokens in between. If those are of equal length and
+        the minimal operations only consist of replacements, then no matrix is built at all. Neither of these
+        shortcuts changes the returned operations.
         """
 
-        matrix = self.__getEditOpsMatrix(other)
-        editOps = []
+        other = self.__getInVocabulary(other)
 
-        r = len(matrix) - 1
-        c = len(matrix[0]) - 1
+        return [
+            DeleteOperation(index) if kind is DeleteOperation else kind(index, other[index])
+            for kind, index in self.__getEditMovesTo(other, engine, hirschbergThreshold)
+        ]
 
-        while True:
-            if matrix[r][c] == 0:
-                break
-            elif r == 0:
-                c -= 1
-                editOps.insert(0, InsertOperation(c, other[c]))
-            elif c == 0:
-                r -= 1
-                editOps.insert(0, DeleteOperation(c))
-            elif self[r - 1] == other[c - 1]:
-                r -= 1
-                c -= 1
-            elif matrix[r][c] == matrix[r - 1][c - 1] + 1:
+    def getCondensedEditOperationsTo(
+        self,
+        other: "AbstractMethod",
+        policy: str = "loose",
+        engine: str = "python",
+        hirschbergThreshold: int = 1000000
+    ) -> List[CompoundOperation]:
+        """
+        Returns the same list of CompoundOperations as condensing the operations returned by `getEditOperationsTo`
+        according to the given `policy`, which can be one of the following:
+        - `"basic"`: as by `getCondensedBasic`
+        - `"loose"`: as by `getCondensedLoose`. This is the default behavior.
+        - `"strict"`: as by `getCondensedStrict`
+
+        The CompoundOperations are built directly while determining the operations, without creating the basic
+        operations first. See `getEditOperationsTo` for `engine` and `hirschbergThreshold`.
+        """
+
+        if policy not in ("basic", "loose", "strict"):
+            raise ValueError("AbstractMethod: invalid policy: {}".format(repr(policy)))
+
+        other = self.__getInVocabulary(other)
+        compoundOps = []
+        tokens = None
+
+        # The operations are in order, and each one begins where the previous one ends unless there are equal tokens
+        # between them. Consecutive operations without equal tokens between them touch each other, so they are
+        # condensed if the policy is loose, or if the policy is strict and they are of the same type.
+        for kind, index in self.__getEditMovesTo(other, engine, hirschbergThreshold):
+
+            if tokens is None or index != nextIndex or policy == "basic" or policy == "strict" and kind is not _type:
+
+                if tokens is not None:
+                    compoundOps.append(CompoundOperation.FromIndexRange(beginIndex, beginIndex + numDeleted, tokens))
+
+                beginIndex = index
+                numDeleted = 0
+                tokens = []
+                _type = kind
+
+            if kind is not InsertOperation:
+                numDeleted += 1
+
+            if kind is DeleteOperation:
+                nextIndex = index
+            else:
+                tokens.append(other[index])
+                nextIndex = index + 1
+
+        if tokens is not None:
+            compoundOps.append(CompoundOperation.FromIndexRange(beginIndex, beginIndex + numDeleted, tokens))
+
+        return compoundOps
+
+    def __getEditMovesTo(
+        self,
+        other: "AbstractMethod",
+        engine: str,
+        hirschbergThreshold: int
+    ) -> List[Tuple[Type[EditOperation], int]]:
+
+        # Returns the type and index of each operation returned by getEditOperationsTo, in order. The tokens of inserts
+        # and replacements are those of other at the same index, so they are not included.
+        selfIds = self.__tokenIds
+        otherIds = other.__tokenIds
+
+        # determine the lengths of the common suffix and then the common prefix; the suffix is trimmed first since the
+        # operations are determined by walking back from the end of both methods
+        suffix = 0
+        while suffix < min(len(self), len(other)) and selfIds[-1 - suffix] == otherIds[-1 - suffix]:
+            suffix += 1
+
+        prefix = 0
+        while prefix < min(len(self), len(other)) - suffix and selfIds[prefix] == otherIds[prefix]:
+            prefix += 1
+
+        source = self.__withTokenIds(selfIds[prefix : len(self) - suffix])
+        target = self.__withTokenIds(otherIds[prefix : len(other) - suffix])
+
+        # If the remaining tokens are of equal length, try to transform them with replacements only. This is minimal if
+        # the number of replacements (the Hamming distance) equals the Levenshtein distance, in which case walking back
+        # through the matrix would follow its diagonal and result in exactly these replacements.
+        if len(source) == len(target):
+            moves = [
+                (ReplaceOperation, prefix + i)
+                for i in range(len(target)) if source.__tokenIds[i] != target.__tokenIds[i]
+            ]
+            if len(moves) == source.getEditDistanceTo(target):
+                return moves
+
+        if (len(source) + 1) * (len(target) + 1) <= hirschbergThreshold:
+            return self.__getEditMovesFromMatrix(other, engine, prefix, suffix)
+
+        return AbstractMethod.__shiftEditMoves(source.__getEditMovesHirschberg(target, engine, hirschbergThreshold), prefix)
+
+    def __getEditDistanceBitParallel(self, other: "AbstractMethod") -> int:
+
+        # the shorter method is encoded as bitvectors, one bit per token; since the Levenshtein distance is symmetric,
+        # it doesn't matter which method is which
+        pattern, text = (self, other) if len(self) <= len(other) else (other, self)
+        if len(pattern) == 0:
+            return len(text)
+
+        # bitmask of the positions at which each token appears in the pattern
+        tokenMasks = {}
+        for i, token in enumerate(pattern.__tokenIds):
+            tokenMasks[token] = tokenMasks.get(token, 0) | (1 << i)
+
+        # vertical deltas of the current matrix column, encoded as a positive and a negative bitvector; the first
+        # column increases by one in every row
+        mask = (1 << len(pattern)) - 1
+        lastBit = 1 << (len(pattern) - 1)
+        positiveVertical = mask
+        negativeVertical = 0
+        distance = len(pattern)
+
+        # advance one column per token of the text and keep track of the value in the last row
+        for token in text.__tokenIds:
+
+            matches = tokenMasks.get(token, 0)
+            xVertical = matches | negativeVertical
+            xHorizontal = (((matches & positiveVertical) + positiveVertical) ^ positiveVertical) | matches
+
+            positiveHorizontal = negativeVertical | ~(xHorizontal | positiveVertical)
+            negativeHorizontal = positiveVertical & xHorizontal
+
+            if positiveHorizontal & lastBit:
+                distance += 1
+            elif negativeHorizontal & lastBit:
+                distance -= 1
+
+            # the first row increases by one in every column, so a positive delta is shifted in
+            positiveHorizontal = (positiveHorizontal << 1) | 1
+            negativeHorizontal = negativeHorizontal << 1
+
+            positiveVertical = (negativeHorizontal | ~(xVertical | positiveHorizontal)) & mask
+            negativeVertical = positiveHorizontal & xVertical & mask
+
+        return distance
+
+    def __getEditDistanceBanded(self, other: "AbstractMethod", maxDistance: int) -> int:
+
+        if maxDistance < 0:
+            raise ValueError("AbstractMethod: invalid maximum distance: {}".format(maxDistance))
+
+        # the distance is at least the difference in lengths
+        exceeded = maxDistance + 1
+        if abs(len(self) - len(other)) > maxDistance:
+            return exceeded
+
+        # the shorter method gives the rows, so that the band covers at most 2 * maxDistance + 1 columns of each row
+        rowTokens, colTokens = (
+            (self.__tokenIds, other.__tokenIds) if len(self) <= len(other) else (other.__tokenIds, self.__tokenIds)
+        )
+        numRows = len(rowTokens) + 1
+        numCols = len(colTokens) + 1
+
+        # Each row only holds the cells of the band, i.e. from column r - maxDistance to column r + maxDistance. A cell
+        # outside of the band is always further than maxDistance, so any value greater than maxDistance is capped to
+        # the value of exceeded.
+        prevRow = list(range(min(numCols, exceeded)))
+        prevLow = 0
+
+        for r in range(1, numRows):
+
+            low = max(0, r - maxDistance)
+            high = min(numCols - 1, r + maxDistance)
+            token = rowTokens[r - 1]
+
+            row = [r] if low == 0 else []
+
+            for c in range(max(low, 1), high + 1):
+
+                topLeft = prevRow[c - 1 - prevLow]
+
+                if token == colTokens[c - 1]:
+                    row.append(topLeft)
+                else:
+                    left = row[-1] if len(row) > 0 else exceeded
+                    top = prevRow[c - prevLow] if c - prevLow < len(prevRow) else exceeded
+                    row.append(min(left, topLeft, top, maxDistance) + 1)
+
+            # stop early once every cell in the band is too far, since the values can only grow in later rows
+            if min(row) > maxDistance:
+                return exceeded
+
+            prevRow = row
+            prevLow = low
+
+        return prevRow[-1]
+
+    def __getEditMovesHirschberg(
+        self,
+        other: "AbstractMethod",
+        engine: str,
+        hirschbergThreshold: int
+    ) -> List[Tuple[Type[EditOperation], int]]:
+
+        # use the full matrix if it is small enough, or if this method can't be split any further
+        if (len(self) + 1) * (len(other) + 1) <= hirschbergThreshold or len(self) < 2:
+            return self.__getEditMovesFromMatrix(other, engine)
+
+        # split this method in half, and determine the distances from its left half to each prefix of other and from
+        # its right half to each suffix of other
+        middle = len(self) // 2
+        left = self.__withTokenIds(self.__tokenIds[:middle])
+        right = self.__withTokenIds(self.__tokenIds[middle:])
+        forwardRow = left.__getLastEditOpsRow(other, engine)
+        backwardRow = self.__withTokenIds(right.__tokenIds[::-1]).__getLastEditOpsRow(
+                self.__withTokenIds(other.__tokenIds[::-1]), engine)
+
+        # split other where the total distance is minimal, taking the earliest such split so that results are
+        # reproducible
+        split = min(range(len(other) + 1), key = lambda c: forwardRow[c] + backwardRow[len(other) - c])
+
+        # determine the operations of both halves; the operations of the right half are applied once the tokens before
+        # index split already match other, so their indices have to be shifted accordingly
+        moves = left.__getEditMovesHirschberg(
+                self.__withTokenIds(other.__tokenIds[:split]), engine, hirschbergThreshold)
+
+        moves += AbstractMethod.__shiftEditMoves(right.__getEditMovesHirschberg(
+                self.__withTokenIds(other.__tokenIds[split:]), engine, hirschbergThreshold), split)
+
+        return moves
+
+    def __getEditMovesFromMatrix(
+        self,
+        other: "AbstractMethod",
+        engine: str,
+        prefix: int = 0,
+        suffix: int = 0
+    ) -> List[Tuple[Type[EditOperation], int]]:
+
+        # The matrix is only built for the tokens between the common prefix and the common suffix. Thus, matrix[i][j] is
+        # the distance between the first prefix + i tokens of this method and the first prefix + j tokens of other.
+        selfIds = self.__tokenIds
+        otherIds = other.__tokenIds
+        matrix = self.__withTokenIds(selfIds[prefix : len(self) - suffix]).__getEditOpsMatrix(
+                self.__withTokenIds(otherIds[prefix : len(other) - suffix]), engine)
+        moves = []
+
+        i = len(matrix) - 1
+        j = len(matrix[0]) - 1
+
+        # walk back through the matrix until reaching its first row or column; the operations are found in reverse order
+        # so they are reversed at the end
+        while i > 0 and j > 0 and matrix[i][j] != 0:
+            if selfIds[prefix + i - 1] == otherIds[prefix + j - 1]:
+                i -= 1
+                j -= 1
+            elif matrix[i][j] == matrix[i - 1][j - 1] + 1:
+                i -= 1
+                j -= 1
+                moves.append((ReplaceOperation, prefix + j))
+            elif matrix[i][j] == matrix[i][j - 1] + 1:
+                j -= 1
+                moves.append((InsertOperation, prefix + j))
+            elif matrix[i][j] == matrix[i - 1][j] + 1:
+                i -= 1
+                moves.append((DeleteOperation, prefix + j))
+            else:
+                raise RuntimeError("AbstractMethod: invalid matrix!")
+
+        # The remaining tokens before index r of this method and before index c of other are equal, except that one of
+        # them has c - r more tokens than the other; the distance between them is exactly that difference. Continue as
+        # if the full matrix had been built: the extra tokens are inserted or deleted, preferring to match equal tokens.
+        r = prefix + i
+        c = prefix + j
+
+        while r < c:
+            if r > 0 and selfIds[r - 1] == otherIds[c - 1]:
                 r -= 1
                 c -= 1
-                editOps.insert(0, ReplaceOperation(c, other[c]))
-            elif matrix[r][c] == matrix[r][c - 1] + 1:
+            else:
                 c -= 1
-                editOps.insert(0, InsertOperation(c, other[c]))
-            elif matrix[r][c] == matrix[r - 1][c] + 1:
+                moves.append((InsertOperation, c))
+
+        while r > c:
+            if c > 0 and selfIds[r - 1] == otherIds[c - 1]:
                 r -= 1
-                editOps.insert(0, DeleteOperation(c))
+                c -= 1
             else:
-                raise RuntimeError("AbstractMethod: invalid matrix!")
+                r -= 1
+                moves.append((DeleteOperation, c))
+
+        moves.reverse()
+
+        return moves
+
+    def __shiftEditMoves(
+        moves: List[Tuple[Type[EditOperation], int]],
+        offset: int
+    ) -> List[Tuple[Type[EditOperation], int]]:
+        # returns the given moves with their indices shifted by offset
+        return [(kind, index + offset) for kind, index in moves]
 
-        return editOps
+    def __getEditOpsMatrix(self, other: "AbstractMethod", engine: str) -> Union[List[List[int]], np.ndarray]:
 
-    def __getEditOpsMatrix(self, other: "AbstractMethod") -> List[List[int]]:
+        rows = list(self.__iterEditOpsRows(other, engine))
+        return rows if engine == "python" else np.array(rows)
+
+    def __getLastEditOpsRow(self, other: "AbstractMethod", engine: str) -> List[int]:
+
+        # only keep a single row in memory at a time
+        for row in self.__iterEditOpsRows(other, engine):
+            pass
+
+        return row if engine == "python" else row.tolist()
+
+    def __iterEditOpsRows(self, other: "AbstractMethod", engine: str) -> Iterator[Union[List[int], np.ndarray]]:
+
+        # rows of the Levenshtein matrix are yielded one at a time, as computed by the given engine
+        if engine == "python":
+            return self.__iterEditOpsRowsPython(other)
+        elif engine == "numpy":
+            return self.__iterEditOpsRowsNumpy(other)
+
+        raise ValueError("AbstractMethod: invalid engine: {}".format(repr(engine)))
+
+    def __iterEditOpsRowsPython(self, other: "AbstractMethod") -> Iterator[List[int]]:
 
         numRows = len(self) + 1
         numCols = len(other) + 1
 
-        # initialize matrix
-        matrix = []
-        for r in range(numRows):
-            matrix.append([c if r == 0 else 0 for c in range(numCols)])
-            matrix[r][0] = r
+        row = list(range(numCols))
+        yield row
 
-        # iterate through matrix and assign values
+        # compute each row from the previous one
         for r in range(1, numRows):
+
+            prevRow = row
+            row = [r] * numCols
+            token = self.__tokenIds[r - 1]
+
             for c in range(1, numCols):
 
-                left =    matrix[r    ][c - 1]
-                topLeft = matrix[r - 1][c - 1]
-                top =     matrix[r - 1][c    ]
+                left =    row    [c - 1]
+                topLeft = prevRow[c - 1]
+                top =     prevRow[c    ]
 
-                if self[r - 1] == other[c - 1]:
-                    matrix[r][c] = topLeft
+                if token == other.__tokenIds[c - 1]:
+                    row[c] = topLeft
                 else:
-                    matrix[r][c] = min(left, topLeft, top) + 1
+                    row[c] = min(left, topLeft, top) + 1
+
+            yield row
+
+    def __iterEditOpsRowsNumpy(self, other: "AbstractMethod") -> Iterator[np.ndarray]:
+
+        numRows = len(self) + 1
+        numCols = len(other) + 1
+
+        # view the token IDs as NumPy arrays without copying them
+        selfIds = np.asarray(self.__tokenIds)
+        otherIds = np.asarray(other.__tokenIds)
+        colIndices = np.arange(numCols, dtype = np.int32)
+
+        row = colIndices.copy()
+        yield row
+
+        # compute each row from the previous one. The top and top-left neighbors are taken from the previous row all
+        # at once; the left neighbor depends on the current row, so it is resolved with a running minimum afterwards.
+        for r in range(1, numRows):
+
+            prevRow = row
+            row = np.empty(numCols, dtype = np.int32)
+            row[0] = r
+            row[1:] = np.minimum(prevRow[1:] + 1, prevRow[:-1] + (otherIds != selfIds[r - 1]))
+            row = np.minimum.accumulate(row - colIndices) + colIndices
+
+            yield row
+
+    def __withTokenIds(self, tokenIds: Sequence[int]) -> "AbstractMethod":
+        # creates a method from IDs of this method's vocabulary, without having to look up any tokens
+        return AbstractMethod.FromTokenIds(tokenIds, self.__vocabulary)
+
+    def __getInVocabulary(self, other: "AbstractMethod") -> "AbstractMethod":
+
+        # edit distances are computed by comparing token IDs, so other must use the same vocabulary as this method
+        if other.__vocabulary is self.__vocabulary:
+            return other
+
+        return self.__withTokenIds(self.__vocabulary.getIds(other.getTokens()))
+
+# Cell
+class EditScript:
+    """
+    Creates an `EditScript` from the given list of `operations`, which are applied in order as by
+    `AbstractMethod.applyEditOperations`. Applying an `EditScript` builds a new `AbstractMethod` rather than changing
+    the original one.
+
+    If each operation only affects tokens after the ones affected by the operations before it, as is the case for the
+    operations returned by `AbstractMethod.getEditOperationsTo` and the condensing functions, then the new
+    `AbstractMethod` is built in a single pass over the tokens of the original one. Otherwise, the operations are
+    applied one at a time to a copy of the tokens.
+    """
+
+    def __init__(self, operations: List[EditOperation]) -> None:
+
+        self.__operations = list(operations)
+
+        # Determine the range of the original tokens which each operation replaces, along with the tokens replacing
+        # them. These are only well-defined if each operation begins after the tokens affected by the previous ones;
+        # otherwise, the operations are applied one at a time.
+        self.__edits = []
+        shift = 0
+        nextIndex = 0
+
+        for op in self.__operations:
+
+            if type(op) is not CompoundOperation:
+                op = CompoundOperation(op)
+
+            beginIndex, endIndex = op.getIndexRange()
+            tokens = op.getTokens()
+
+            if beginIndex < nextIndex:
+                self.__edits = None
+                break
+
+            self.__edits.append((beginIndex - shift, endIndex - shift, tokens))
+            shift += len(tokens) - (endIndex - beginIndex)
+            nextIndex = beginIndex + len(tokens)
+
+    def __len__(self) -> int:
+        return len(self.__operations)
+
+    def apply(self, method: AbstractMethod) -> AbstractMethod:
+        """
+        Returns a new `AbstractMethod` which results from applying the operations to the given `method`, which remains
+        unchanged. The new `AbstractMethod` uses the vocabulary of the given one. If any of the operations affects
+        tokens which are out of bounds, raises an `IndexError`.
+        """
+
+        vocabulary = method.getVocabulary()
+
+        if self.__edits is None:
+            tokens = method.getTokens()
+            for op in self.__operations:
+                op.applyToTokens(tokens)
+            return AbstractMethod.FromTokenIds(vocabulary.getIds(tokens), vocabulary)
+
+        # The replaced ranges are in order and do not overlap, so the operations are all within bounds if the last
+        # one is. Otherwise, report the first operation out of bounds.
+        if len(self.__edits) > 0 and self.__edits[-1][1] > len(method):
+            i = next(i for i, (_, endIndex, _) in enumerate(self.__edits) if endIndex > len(method))
+            raise IndexError("EditScript: operation {} ({}) is out of bounds".format(i, self.__operations[i]))
+
+        # copy the unchanged tokens between the replaced ranges, and the replacing tokens in their place
+        tokenIds = method.getTokenIds()
+        newTokenIds = array("I")
+        position = 0
+
+        for beginIndex, endIndex, tokens in self.__edits:
+            newTokenIds.extend(tokenIds[position:beginIndex])
+            newTokenIds.extend(vocabulary.getIds(tokens))
+            position = endIndex
+
+        newTokenIds.extend(tokenIds[position:])
+
+        return AbstractMethod.FromTokenIds(newTokenIds, vocabulary)
+
+# Cell
+class EditScriptTable:
+    """
+    Creates an empty `EditScriptTable`, which stores many edit scripts (i.e. lists of CompoundOperations, such as those
+    returned by `getCondensedBasic`, `getCondensedLoose` and `getCondensedStrict`) compactly in a few arrays rather
+    than as individual objects. The tokens of the operations are stored as IDs of the given `vocabulary`, which
+    defaults to `SHARED_VOCABULARY`.
+
+    The table behaves like a list of lists of CompoundOperations, which are created when they are accessed. Statistics
+    over all operations in the table can be computed from the arrays returned by `getBeginIndices`, `getEndIndices`,
+    `getTypeCodes` and `getTokenCounts` without creating any operations.
+    """
+
+    # the operation types in the order of their type codes
+    __TYPES = (InsertOperation, DeleteOperation, ReplaceOperation)
+
+    def __init__(self, vocabulary: Optional[TokenVocabulary] = None) -> None:
+
+        self.__vocabulary = SHARED_VOCABULARY if vocabulary is None else vocabulary
+
+        # one entry per operation
+        self.__beginIndices = array("I")
+        self.__endIndices = array("I")
+        self.__typeCodes = array("B")
+
+        # the tokens of operation i are the IDs tokenIds[tokenOffsets[i]:tokenOffsets[i + 1]], and the operations of
+        # script i are operations scriptOffsets[i] up to scriptOffsets[i + 1]
+        self.__tokenIds = array("I")
+        self.__tokenOffsets = array("Q", [0])
+        self.__scriptOffsets = array("Q", [0])
+
+    def __len__(self) -> int:
+        return len(self.__scriptOffsets) - 1
+
+    def __getitem__(self, key: int) -> List[CompoundOperation]:
+
+        begin, end = self.__getScriptRange(key)
+
+        return [
+            CompoundOperation.FromIndexRange(
+                self.__beginIndices[i],
+                self.__endIndices[i],
+                self.__vocabulary.getTokens(self.__tokenIds[self.__tokenOffsets[i] : self.__tokenOffsets[i + 1]])
+            )
+            for i in range(begin, end)
+        ]
+
+    def __iter__(self) -> Iterator[List[CompoundOperation]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, operations: List[EditOperation]) -> None:
+        """
+        Adds the given list of `operations` as a new edit script at the end of the table. Operations which are not
+        CompoundOperations are stored as in `getCondensedBasic`.
+        """
+
+        for op in operations:
+
+            if type(op) is not CompoundOperation:
+                op = CompoundOperation(op)
+
+            beginIndex, endIndex = op.getIndexRange()
+            self.__beginIndices.append(beginIndex)
+            self.__endIndices.append(endIndex)
+            self.__typeCodes.append(EditScriptTable.__TYPES.index(op.getType()))
+            self.__tokenIds.extend(self.__vocabulary.getIds(op.getTokens()))
+            self.__tokenOffsets.append(len(self.__tokenIds))
+
+        self.__scriptOffsets.append(len(self.__beginIndices))
+
+    def extend(self, scripts: Iterable[List[EditOperation]]) -> None:
+        """
+        Adds each of the given lists of operations as a new edit script at the end of the table, as in `append`.
+        """
+        for operations in scripts:
+            self.append(operations)
+
+    def getMachineString(self, key: int, form: str = "general") -> str:
+        """
+        Returns the machine strings of the operations of the edit script at index `key`, separated by spaces as in the
+        file written by `writeCompoundOperationsToFile`. See `CompoundOperation.ListToMachineString` for the possible
+        values of `form`.
+        """
+
+        if form not in ("general", "typed", "relative"):
+            raise ValueError("EditScriptTable: invalid form: {}".format(repr(form)))
+
+        begin, end = self.__getScriptRange(key)
+        machineStrings = []
+        previousEnd = 0
+
+        for i in range(begin, end):
+            tag = {"general": "op", "relative": "rel"}.get(form) or ("ins", "del", "rep")[self.__typeCodes[i]]
+            tokens = self.__vocabulary.getTokens(self.__tokenIds[self.__tokenOffsets[i] : self.__tokenOffsets[i + 1]])
+            beginIndex, endIndex = self.__beginIndices[i], self.__endIndices[i]
+
+            # in relative form, the begin index is relative to the last token added by the operation before it
+            if form == "relative":
+                if beginIndex < previousEnd:
+                    raise ValueError("EditScriptTable: operations are not in order for relative form")
+                beginIndex, endIndex = beginIndex - previousEnd, endIndex - beginIndex
+                previousEnd += beginIndex + len(tokens)
+
+            machineStrings.append("<{}> {} {} <sep> {}</{}>".format(
+                tag,
+                beginIndex,
+                endIndex,
+                "".join(token + " " for token in tokens),
+                tag
+            ))
+
+        return " ".join(machineStrings)
+
+    def getNumOperations(self) -> int:
+        """
+        Returns the total number of operations in all edit scripts.
+        """
+        return len(self.__beginIndices)
+
+    def getScriptLengths(self) -> array:
+        """
+        Returns an array of the number of operations in each edit script.
+        """
+        offsets = self.__scriptOffsets
+        return array("Q", [offsets[i + 1] - offsets[i] for i in range(len(self))])
+
+    def getBeginIndices(self) -> array:
+        """
+        Returns an array of the begin index of each operation of all edit scripts, in order.
+        """
+        return self.__beginIndices[:]
+
+    def getEndIndices(self) -> array:
+        """
+        Returns an array of the end index of each operation of all edit scripts, in order.
+        """
+        return self.__endIndices[:]
+
+    def getTypeCodes(self) -> array:
+        """
+        Returns an array of the type of each operation of all edit scripts, in order. The type is given by a
+        code: 0 for `InsertOperation`, 1 for `DeleteOperation` and 2 for `ReplaceOperation`.
+        """
+        return self.__typeCodes[:]
+
+    def getTokenCounts(self) -> array:
+        """
+        Returns an array of the number of tokens added by each operation of all edit scripts, in order.
+        """
+        offsets = self.__tokenOffsets
+        return array("Q", [offsets[i + 1] - offsets[i] for i in range(len(offsets) - 1)])
+
+    def getVocabulary(self) -> TokenVocabulary:
+        """
+        Returns the `TokenVocabulary` of the tokens of the operations.
+        """
+        return self.__vocabulary
+
+    def __getScriptRange(self, key: int) -> Tuple[int, int]:
+
+        # returns the range of operations which belong to the edit script at index key, which may be negative
+        if not -len(self) <= key < len(self):
+            raise IndexError("EditScriptTable: index {} is out of range".format(key))
+
+        key %= len(self)
 
-        return matrix
\ No newline at end of file
+        return self.__scriptOffsets[key], self.__scriptOffsets[key + 1]
\ No newline at end of file
@@ -1,6 +1,6 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: nbs/01_CondenseEditOperations.ipynb (unless otherwise specified).
 
-__all__ = ['getCondensedBasic', 'getCondensedLoose', 'getCondensedStrict']
+__all__ = ['getCondensedBasic', 'getCondensedLoose', 'getCondensedStrict', 'getCondensedWindowed']
 
 # Cell
 #hide
@@ -10,6 +10,7 @@ import sys
 sys.path.append("..")
 
 from .EditOperations import *
+from .AbstractMethod import *
 
 # Cell
 def getCondensedBasic(operations: List[EditOperation]) -> List[CompoundOperation]:
@@ -27,26 +28,85 @@ def getCondensedBasic(operations: List[EditOperation]) -> List[CompoundOperation
     return compoundOps
 
 # Cell
-def getCondensedLoose(operations: List[EditOperation]) -> List[CompoundOperation]:
+#hide
+def _getCondensedInOneSweep(operations: List[EditOperation], strict: bool) -> List[CompoundOperation]:
     """
-    Returns a list of CompoundOperations from the given list of `operations` such that each `CompoundOperation`
-    in the returned list repesents EditOperations that are loosely compatible. This effectively "condenses" the
-    given list according to loose compatibility. The length of the returned list is minimized such that it is
-    as condensed as possible.
+    Returns the same list of CompoundOperations as repeatedly adding the given `operations` to the last
+    `CompoundOperation` with `CompoundOperation.addLoose` or, if `strict`, with `CompoundOperation.addStrict`, and
+    starting a new `CompoundOperation` whenever the addition fails. The index range and tokens of the last
+    `CompoundOperation` are kept in local variables and its tokens are changed in place, so adding operations to the
+    end of a long `CompoundOperation` does not copy its tokens every time.
     """
 
     compoundOps = []
+    beginIndex = endIndex = tokens = _type = None
 
-    if len(operations) > 0:
-
-        compoundOps = [CompoundOperation(operations[0])]
+    for op in operations:
 
-        for op in operations[1:]:
-            if not compoundOps[-1].addLoose(op):
-                compoundOps.append(CompoundOperation(op))
+        # get the attributes the operation would have as a CompoundOperation
+        if type(op) is CompoundOperation:
+            opBeginIndex, opEndIndex = op.getIndexRange()
+            opTokens = op.getTokens()
+            opType = op.getType()
+        else:
+            opBeginIndex = op.getIndex()
+            opEndIndex = opBeginIndex if type(op) is InsertOperation else opBeginIndex + 1
+            opTokens = [] if type(op) is DeleteOperation else [op.getToken()]
+            opType = type(op)
+
+        # start a new CompoundOperation if the affected ranges of tokens do not touch, as in addLoose, or if the type
+        # is different, as in addStrict
+        if (tokens is None or opEndIndex < beginIndex or opBeginIndex > beginIndex + len(tokens) or
+                strict and opType is not _type):
+
+            if tokens is not None:
+                compoundOps.append(CompoundOperation.FromIndexRange(beginIndex, endIndex, tokens))
+
+            beginIndex, endIndex, tokens = opBeginIndex, opEndIndex, opTokens
+
+        # otherwise, add the operation to the current CompoundOperation in the same way as addLoose
+        else:
+
+            endAffectedIndex = beginIndex + len(tokens)
+
+            if opBeginIndex < beginIndex:
+                if opEndIndex <= endAffectedIndex:
+                    tokens[: opEndIndex - beginIndex] = opTokens
+                else:
+                    tokens = opTokens
+                    endIndex += opEndIndex - endAffectedIndex
+                beginIndex = opBeginIndex
+            else:
+                if opEndIndex <= endAffectedIndex:
+                    tokens[opBeginIndex - beginIndex : opEndIndex - beginIndex] = opTokens
+                else:
+                    tokens[opBeginIndex - beginIndex :] = opTokens
+                    endIndex += opEndIndex - endAffectedIndex
+
+        # determine the type as in CompoundOperation
+        if endIndex == beginIndex and len(tokens) > 0:
+            _type = InsertOperation
+        elif endIndex > beginIndex and len(tokens) == 0:
+            _type = DeleteOperation
+        else:
+            _type = ReplaceOperation
+
+    if tokens is not None:
+        compoundOps.append(CompoundOperation.FromIndexRange(beginIndex, endIndex, tokens))
 
     return compoundOps
 
+# Cell
+def getCondensedLoose(operations: List[EditOperation]) -> List[CompoundOperation]:
+    """
+    Returns a list of CompoundOperations from the given list of `operations` such that each `CompoundOperation`
+    in the returned list repesents EditOperations that are loosely compatible. This effectively "condenses" the
+    given list according to loose compatibility. The length of the returned list is minimized such that it is
+    as condensed as possible.
+    """
+
+    return _getCondensedInOneSweep(operations, strict = False)
+
 # Cell
 def getCondensedStrict(operations: List[EditOperation]) -> List[CompoundOperation]:
     """
@@ -56,14 +116,60 @@ def getCondensedStrict(operations: List[EditOperation]) -> List[CompoundOperatio
     condensed as possible.
     """
 
+    return _getCondensedInOneSweep(operations, strict = True)
+
+# Cell
+def getCondensedWindowed(operations: List[EditOperation], gap: int, method: AbstractMethod) -> List[CompoundOperation]:
+    """
+    Returns a list of CompoundOperations from the given list of `operations` such that each `CompoundOperation`
+    in the returned list represents EditOperations which are at most `gap` unchanged tokens apart. The unchanged
+    tokens between them are taken from `method`, the `AbstractMethod` to which the operations apply, and are included
+    in both the deleted range and the added tokens of the `CompoundOperation`. This results in fewer but longer
+    CompoundOperations as `gap` increases; a `gap` of 0 is equivalent to `getCondensedLoose`.
+
+    The operations must be in order, such that each operation only affects tokens after the ones affected by the
+    operations before it, as is the case for the operations returned by `AbstractMethod.getEditOperationsTo`.
+    Raises a `ValueError` if they are not, or if they do not apply to `method`.
+    """
+
+    if gap < 0:
+        raise ValueError("getCondensedWindowed: invalid gap: {}".format(gap))
+
     compoundOps = []
+    beginIndex = endIndex = tokens = None
+
+    # number of tokens added by the CompoundOperations before the current one, which converts indices of the
+    # current one to indices of the method
+    shift = 0
+
+    for op in getCondensedLoose(operations):
+
+        opBeginIndex, opEndIndex = op.getIndexRange()
+        opTokens = op.getTokens()
+
+        if tokens is not None and opBeginIndex < beginIndex + len(tokens):
+            raise ValueError("getCondensedWindowed: operations are not in order")
+
+        # merge the operation into the current CompoundOperation if there are at most gap unchanged tokens between them
+        if tokens is not None and opBeginIndex - (beginIndex + len(tokens)) <= gap:
+
+            numUnchanged = opBeginIndex - (beginIndex + len(tokens))
+            unchangedTokens = method[endIndex - shift : endIndex - shift + numUnchanged]
+            if len(unchangedTokens) < numUnchanged:
+                raise ValueError("getCondensedWindowed: operations do not apply to the method")
+
+            tokens += unchangedTokens + opTokens
+            endIndex += numUnchanged + opEndIndex - opBeginIndex
+
+        else:
 
-    if len(operations) > 0:
+            if tokens is not None:
+                compoundOps.append(CompoundOperation.FromIndexRange(beginIndex, endIndex, tokens))
+                shift += len(tokens) - (endIndex - beginIndex)
 
-        compoundOps = [CompoundOperation(operations[0])]
+            beginIndex, endIndex, tokens = opBeginIndex, opEndIndex, opTokens
 
-        for op in operations[1:]:
-            if not compoundOps[-1].addStrict(op):
-                compoundOps.append(CompoundOperation(op))
+    if tokens is not None:
+        compoundOps.append(CompoundOperation.FromIndexRange(beginIndex, endIndex, tokens))
 
     return compoundOps
\ No newline at end of file
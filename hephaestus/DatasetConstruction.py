@@ -1,6 +1,6 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: nbs/04_DatasetConstruction.ipynb (unless otherwise specified).
 
-__all__ = ['makeEditOpsFile', 'DATA_SMALL_METHODS_TRAIN_BUGGY', 'DATA_SMALL_METHODS_TRAIN_FIXED',
+__all__ = ['makeEditOpsFiles', 'makeEditOpsFile', 'DATA_SMALL_METHODS_TRAIN_BUGGY', 'DATA_SMALL_METHODS_TRAIN_FIXED',
            'DATA_SMALL_METHODS_VALID_BUGGY', 'DATA_SMALL_METHODS_VALID_FIXED', 'DATA_SMALL_METHODS_TEST_BUGGY',
            'DATA_SMALL_METHODS_TEST_FIXED', 'DATA_SMALL_OPS_GENERAL_BASIC_TRAIN', 'DATA_SMALL_OPS_GENERAL_BASIC_VALID',
            'DATA_SMALL_OPS_GENERAL_STRICT_TRAIN', 'DATA_SMALL_OPS_GENERAL_STRICT_VALID',
@@ -10,46 +10,230 @@ __all__ = ['makeEditOpsFile', 'DATA_SMALL_METHODS_TRAIN_BUGGY', 'DATA_SMALL_METH
 
 # Cell
 #hide
-from typing import Callable, List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
 from copy import deepcopy
+from functools import partial
+from itertools import islice, zip_longest
 
+import os
 import sys
+import time
 sys.path.append("..")
 
 from .EditOperations import *
+from .AbstractMethod import *
 from .CondenseEditOperations import *
 from .IOUtils import *
 
+# Cell
+#hide
+def _getEditOpsLines(
+    methodPairs: List[Tuple[str, str]],
+    outputs: List[Tuple[Callable[[List[EditOperation]], List[CompoundOperation]], str]]
+) -> List[List[str]]:
+    """
+    Returns the lines of machine strings for the given `methodPairs`, a list of tuples of source and target abstract
+    method lines, for each `(condenser, form)` tuple in the given `outputs`. The edit operations between each pair of
+    methods are determined only once and condensed with each distinct condenser. This function is run in the worker
+    processes of `makeEditOpsFiles`.
+    """
+
+    # the condensers of the CondenseEditOperations module are fused with determining the operations, which results in
+    # the same operations without creating the basic ones first; this is only worth it if there is a single condenser
+    condensers = list(dict.fromkeys(condenser for condenser, _ in outputs))
+    policy = None
+    if len(condensers) == 1:
+        policy = {getCondensedBasic: "basic", getCondensedLoose: "loose", getCondensedStrict: "strict"}.get(condensers[0])
+
+    lines = [[] for _ in outputs]
+
+    for sourceLine, targetLine in methodPairs:
+
+        sourceMethod = AbstractMethod(sourceLine.strip())
+        targetMethod = AbstractMethod(targetLine.strip())
+
+        # determine the edit operations once and condense them with each condenser
+        if policy is not None:
+            operations = {condensers[0]: sourceMethod.getCondensedEditOperationsTo(targetMethod, policy)}
+        else:
+            basicOperations = sourceMethod.getEditOperationsTo(targetMethod)
+            operations = {condenser: condenser(basicOperations) for condenser in condensers}
+
+        for i, (condenser, form) in enumerate(outputs):
+            lines[i].append(CompoundOperation.ListToMachineString(operations[condenser], form))
+
+    return lines
+
+# Cell
+#hide
+def _iterOrderedResults(executor: Executor, function: Callable, iterable: Iterable, maxPending: int) -> Iterator:
+    """
+    Returns an iterator over the results of calling `function` on each item of `iterable` in the given `executor`, in
+    the order of `iterable`. At most `maxPending` items are submitted at a time, such that the items and results held
+    in memory are bounded however long `iterable` is.
+    """
+
+    pending = deque()
+
+    for item in iterable:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= maxPending:
+            yield pending.popleft().result()
+
+    while len(pending) > 0:
+        yield pending.popleft().result()
+
+# Cell
+#hide
+def _iterLinePairs(sourceFile: Iterable[str], targetFile: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Returns an iterator over the pairs of lines of the given open `sourceFile` and `targetFile`, which are read in
+    lockstep like in `iterAbstractMethodPairs`. Raises a `ValueError` as soon as one of the files ends before the other.
+    """
+
+    # the source and target lines are None once the respective file has ended
+    for sourceLine, targetLine in zip_longest(sourceFile, targetFile):
+
+        if sourceLine is None or targetLine is None:
+            raise ValueError("makeEditOpsFiles: number of methods differ in source and target files!")
+
+        yield sourceLine, targetLine
+
+# Cell
+def makeEditOpsFiles(
+    abstractSourceFile: str,
+    abstractTargetFile: str,
+    outputs: Dict[str, Tuple[Callable[[List[EditOperation]], List[CompoundOperation]], str]],
+    workers: Optional[int] = 1,
+    chunkSize: int = 1000,
+    verbose: bool = False
+) -> None:
+    """
+    Determines the list of CompoundEditOperations between abstract methods given in `abstractSourceFile` and
+    `abstractTargetFile`, then writes those operations in machine format to each of the files given in `outputs`.
+    `outputs` maps each file to a tuple `(condenser, form)`, where `condenser` is the function used for the conversion
+    process, which should be a function provided in the `CondenseEditOperations` module, and `form` is the form of the
+    written machine strings, either `"general"`, `"typed"` or `"relative"`.
+
+    The methods are read and compared in chunks of `chunkSize` pairs, and the operations of each chunk are written to
+    all files before the next chunk is read. Thus, the edit operations between each pair of methods are determined
+    only once, however many files are written.
+
+    If `workers` is greater than 1, the chunks are processed in a pool of that many processes, or in one process per
+    CPU if `workers` is None. The condensers must then be picklable, i.e. defined at the top level of a module. The
+    files are written in the same order as the abstract methods, and at most two chunks per worker are held in memory
+    at a time. If `verbose`, the number of processed pairs and the pairs per second are printed after each chunk.
+
+    All files are opened with `openFile` of the `IOUtils` module, so they are compressed if their names end in the
+    extension of a codec. The source and target files are read once, in lockstep. Raises a `ValueError` if the number
+    of methods in them differ; since this is only noticed once the shorter file ends, each file is written to a
+    temporary file next to it first, which only replaces the file once all pairs are written.
+    """
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers < 1:
+        raise ValueError("makeEditOpsFiles: invalid number of workers: {}".format(workers))
+    if chunkSize < 1:
+        raise ValueError("makeEditOpsFiles: invalid chunk size: {}".format(chunkSize))
+
+    for condenser, form in outputs.values():
+        if form not in ("general", "typed", "relative"):
+            raise ValueError("makeEditOpsFiles: invalid form: {}".format(repr(form)))
+
+    # without any outputs, the files are only read to make sure that the numbers of methods are equal
+    if len(outputs) == 0:
+        with openFile(abstractSourceFile) as sourceFile, openFile(abstractTargetFile) as targetFile:
+            for _ in _iterLinePairs(sourceFile, targetFile):
+                pass
+        return
+
+    # the temporary files keep the names of the files at their end, so that they are compressed in the same way
+    temporaryFiles = [os.path.join(os.path.dirname(file), ".tmp." + os.path.basename(file)) for file in outputs]
+
+    try:
+        with ExitStack() as stack:
+
+            sourceFile = stack.enter_context(openFile(abstractSourceFile, readAhead = True))
+            targetFile = stack.enter_context(openFile(abstractTargetFile, readAhead = True))
+            files = [stack.enter_context(openFile(file, "w")) for file in temporaryFiles]
+
+            # split the pairs of methods into chunks, and determine the lines of each chunk in this process or the pool
+            methodPairs = _iterLinePairs(sourceFile, targetFile)
+            chunks = iter(lambda: list(islice(methodPairs, chunkSize)), [])
+            getLines = partial(_getEditOpsLines, outputs = list(outputs.values()))
+
+            if workers == 1:
+                results = map(getLines, chunks)
+            else:
+                executor = stack.enter_context(ProcessPoolExecutor(workers))
+                results = _iterOrderedResults(executor, getLines, chunks, 2 * workers)
+
+            numPairs = 0
+            startTime = time.perf_counter()
+
+            for lines in results:
+
+                # write the lines of the chunk to each file, one line per pair of methods
+                for f, fileLines in zip(files, lines):
+                    if numPairs > 0:
+                        f.write("\n")
+                    f.write("\n".join(fileLines))
+
+                numPairs += len(lines[0])
+
+                if verbose:
+                    elapsedTime = time.perf_counter() - startTime
+                    sys.stdout.write("\rProcessed {} pairs ({:.1f} pairs/sec)".format(
+                        numPairs, numPairs / elapsedTime if elapsedTime > 0 else 0.0
+                    ))
+                    sys.stdout.flush()
+
+            if verbose:
+                sys.stdout.write("\n")
+
+    # remove the temporary files if the files could not be written completely, e.g. if the number of methods differ
+    except BaseException:
+        for file in temporaryFiles:
+            if os.path.exists(file):
+                os.remove(file)
+        raise
+
+    for temporaryFile, file in zip(temporaryFiles, outputs):
+        os.replace(temporaryFile, file)
+
 # Cell
 def makeEditOpsFile(
     abstractSourceFile: str,
     abstractTargetFile: str,
     editOpsFile: str,
     condenser: Callable[[List[EditOperation]], List[CompoundOperation]],
-    form: str = "general"
+    form: str = "general",
+    workers: Optional[int] = 1,
+    chunkSize: int = 1000,
+    verbose: bool = False
 ) -> None:
     """
     Determines the list of CompoundEditOperations between abstract methods given in `abstractSourceFile` and
     `abstractTargetFile`, then writes those operations in machine format to the given `editOpsFile`. The form of the
     written machine string is determined by `form`, and defaults to `"general"`. The conversion process is done with
     the given `condenser` function, which should be a function provided in the `CondenseEditOperations` module.
+    `workers`, `chunkSize` and `verbose` are passed on to `makeEditOpsFiles`, which should be used instead to write
+    several files for the same abstract methods.
     """
 
-    # get the abstract methods
-    sourceMethods = readAbstractMethodsFromFile(abstractSourceFile)
-    targetMethods = readAbstractMethodsFromFile(abstractTargetFile)
-
-    # make sure the number of abstract methods in both files are equal
-    if len(sourceMethods) != len(targetMethods):
-        raise ValueError("makeEditOpsFile: number of methods differ in source and target files!")
-
-    # determine edit operations
-    operations = []
-    for sourceMethod, targetMethod in zip(sourceMethods, targetMethods):
-        operations.append(condenser(sourceMethod.getEditOperationsTo(targetMethod)))
-
-    # write the edit operations to the file
-    writeCompoundOperationsToFile(editOpsFile, operations, form)
+    makeEditOpsFiles(
+        abstractSourceFile,
+        abstractTargetFile,
+        {editOpsFile: (condenser, form)},
+        workers = workers,
+        chunkSize = chunkSize,
+        verbose = verbose
+    )
 
 # Cell
 # abstract method files
@@ -7,8 +7,6 @@ __all__ = ['InsertOperation', 'DeleteOperation', 'ReplaceOperation', 'EditOperat
 #hide
 from typing import List, Union, Tuple, Type
 
-import re
-
 # Cell
 class InsertOperation:
     """
@@ -192,41 +190,88 @@ class CompoundOperation:
         """
         Returns a `CompoundOperation` which represents the given machine string such that the following equality holds:
         `operation == CompoundOperation.FromMachineString(operation.getMachineString())`. The `CompoundOperation` is
-        derived from the given machine string regardless if it is of general form or typed form.
+        derived from the given machine string regardless if it is of general form, typed form or relative form.
         """
 
-        # first, attempt to parse the input machine string
-        match = re.search(r"^<(?P<type>.+?)> (?P<beginIndex>\d+) (?P<endIndex>\d+)" +
-                r" <sep>(?P<newTokens> (?:[^ ]+ )*)</(?P=type)>$", string)
-        if not match:
-            raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+        return CompoundOperation.__parseMachineString(string, 0, toEnd = True)[0]
 
-        # get compound operation attributes from match results
-        _type = {"op": None, "ins": InsertOperation, "del": DeleteOperation, "rep": ReplaceOperation}[match.group("type")]
-        beginIndex = int(match.group("beginIndex"))
-        endIndex = int(match.group("endIndex"))
-        newTokens = match.group("newTokens").strip().split(" ")
-        if newTokens == [""]:
-            newTokens = []
+    def FromIndexRange(beginIndex: int, endIndex: int, newTokens: List[str]) -> "CompoundOperation":
+        """
+        Returns a `CompoundOperation` which deletes the tokens in the range `beginIndex:endIndex` and then adds the
+        given `newTokens` at `beginIndex`, as described by `getIndexRange` and `getTokens`. Raises a `ValueError` if the
+        range is invalid.
+        """
 
-        # make sure endIndex is at least beginIndex
-        if not endIndex >= beginIndex:
-            raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+        if not 0 <= beginIndex <= endIndex:
+            raise ValueError("CompoundOperation: invalid index range: {}:{}".format(beginIndex, endIndex))
 
-        # build the compound operation, start with an "empty" operation with no deletions or insertions
-        operation = CompoundOperation(InsertOperation(beginIndex, "<placeholder>"))
-        operation.addLoose(DeleteOperation(beginIndex))
+        operation = object.__new__(CompoundOperation)
         operation.__beginIndex = beginIndex
         operation.__endIndex = endIndex
-        operation.__newTokens = newTokens
+        operation.__newTokens = list(newTokens)
         operation.__setType()
 
-        # make sure that if the machine string was of typed form, that the resulting CompoundOperation has the same type
-        if _type is not None and _type != operation.getType():
-            raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
-
         return operation
 
+    def ListFromMachineString(string: str) -> List["CompoundOperation"]:
+        """
+        Returns the list of CompoundOperations represented by the given `string` of machine strings separated by
+        whitespace, such as a line of the file written by `writeCompoundOperationsToFile`. Each machine string can be of
+        general form, typed form or relative form, as in `FromMachineString`, where the indices of relative form are
+        relative to the operation before it, as in `ListToMachineString`. The string is parsed in a single pass; if any
+        part of it is not a valid machine string, raises a `ValueError`. An empty string represents an empty list.
+        """
+
+        # most strings can be parsed from their space-separated pieces; the others are parsed one character at a time
+        try:
+            return CompoundOperation.__parseSpacedMachineStrings(string)
+        except ValueError:
+            pass
+
+        operations = []
+        position = 0
+        previousEnd = 0
+
+        while True:
+
+            # skip the whitespace in front of the next machine string, and stop if there is none
+            while position < len(string) and string[position].isspace():
+                position += 1
+
+            if position == len(string):
+                return operations
+
+            operation, position = CompoundOperation.__parseMachineString(string, position, previousEnd)
+            operations.append(operation)
+            previousEnd = operation.__beginIndex + len(operation.__newTokens)
+
+    def ListToMachineString(operations: List["CompoundOperation"], form: str = "general") -> str:
+        """
+        Returns the machine strings of the given list of `operations` in the given `form`, separated by spaces, such that
+        the following equality holds: `operations == CompoundOperation.ListFromMachineString(
+        CompoundOperation.ListToMachineString(operations, form))`. The forms are the ones of `getMachineString`, except
+        that the indices of relative form are relative to the operation before it rather than to the beginning of the
+        tokens: `beginIndex` is the number of tokens between the last token added by the operation before it and the
+        beginning of the deleted range. Raises a `ValueError` for relative form if an operation begins before the last
+        token added by the operation before it, since the number of tokens in between would be negative.
+        """
+
+        if form != "relative":
+            return " ".join(op.getMachineString(form) for op in operations)
+
+        machineStrings = []
+        previousEnd = 0
+
+        for op in operations:
+
+            if op.__beginIndex < previousEnd:
+                raise ValueError("CompoundOperation: operations are not in order for relative form")
+
+            machineStrings.append(op.__getMachineString("rel", op.__beginIndex - previousEnd))
+            previousEnd = op.__beginIndex + len(op.__newTokens)
+
+        return " ".join(machineStrings)
+
     def getMachineString(self, form: str = "general") -> str:
         """
         Returns a string formatted for use in training a machine learning model, i.e. a `HephaestusModel`. The structure is
@@ -234,11 +279,14 @@ class CompoundOperation:
 
         `<X> beginIndex endIndex <sep> tokens </X>`
 
-        The value of `X` depends on the given `form` parameter. The ouputted machine string can be of *general form* or
-        *typed form*:
+        The value of `X` depends on the given `form` parameter. The ouputted machine string can be of *general form*,
+        *typed form* or *relative form*:
         - `"general"`: `X` will always be `"op"`, regardless of the CompoundOperation's type. Thus, the type of the operation
           is *generalized*. This is the default behavior.
         - `"typed"`: `X` will be one of `"ins"`, `"del"`, or `"rep"`, depending on the type of the `CompoundOperation`.
+        - `"relative"`: `X` will always be `"rel"`, and `endIndex` is replaced by the number of deleted tokens. In a list
+          of operations written by `ListToMachineString`, `beginIndex` is relative to the operation before it, which
+          keeps both numbers small.
 
         The range `beginIndex:endIndex` refers to the pythonic range of tokens which the `CompoundOperation` deletes.
         Thus, if `beginIndex` and `endIndex` are equal, then no tokens are deleted. `tokens` refers to the list of tokens
@@ -253,16 +301,12 @@ class CompoundOperation:
             tag = "op"
         elif form == "typed":
             tag = {InsertOperation: "ins", DeleteOperation: "del", ReplaceOperation: "rep"}[self.__type]
+        elif form == "relative":
+            tag = "rel"
         else:
             raise ValueError("CompoundOperation: invalid form: {}".format(repr(form)))
 
-        return "<{}> {} {} <sep>{}</{}>".format(
-            tag,
-            self.__beginIndex,
-            self.__endIndex,
-            " " if len(self.__newTokens) == 0 else " " + " ".join(self.__newTokens) + " ",
-            tag
-        )
+        return self.__getMachineString(tag, self.__beginIndex)
 
     def __eq__(self, other: "CompoundOperation") -> bool:
         # don't have to check __type attribute, because it is a function of the index range and tokens
@@ -388,6 +432,169 @@ class CompoundOperation:
 
         tokens[self.__beginIndex:self.__endIndex] = self.__newTokens
 
+    def __getMachineString(self, tag: str, beginIndex: int) -> str:
+        """
+        Returns the machine string with the given `tag` and `beginIndex`. The end index is the number of deleted tokens
+        if the tag is the one of relative form.
+        """
+
+        return "<{}> {} {} <sep>{}</{}>".format(
+            tag,
+            beginIndex,
+            self.__endIndex - self.__beginIndex if tag == "rel" else self.__endIndex,
+            " " if len(self.__newTokens) == 0 else " " + " ".join(self.__newTokens) + " ",
+            tag
+        )
+
+    def __parseMachineString(
+        string: str,
+        position: int,
+        previousEnd: int = 0,
+        toEnd: bool = False
+    ) -> Tuple["CompoundOperation", int]:
+        """
+        Parses the machine string which starts at index `position` of the given `string`. Returns the parsed
+        `CompoundOperation` and the index just past the end of its machine string. Raises a `ValueError` if there is no
+        valid machine string at `position`. The indices of a machine string of relative form are relative to the given
+        `previousEnd`.
+
+        If `toEnd` is True, the machine string ends at the end of the string. Otherwise, it ends at the first `">"` at
+        least three characters after the first `"</"` following the opening tag, so the new tokens can contain `"</"`
+        as long as no `">"` follows it before the closing tag.
+        """
+
+        # parse the opening tag, which determines the type of typed machine strings
+        tagEnd = string.find("> ", position)
+        tag = string[position + 1 : tagEnd]
+        if not string.startswith("<", position) or tagEnd == -1 or tag not in ("op", "ins", "del", "rep", "rel"):
+            raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+
+        # parse the index range
+        beginEnd = string.find(" ", tagEnd + 2)
+        endEnd = string.find(" ", beginEnd + 1)
+        if beginEnd == -1 or endEnd == -1:
+            raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+
+        beginIndex = string[tagEnd + 2 : beginEnd]
+        endIndex = string[beginEnd + 1 : endEnd]
+        if not string.startswith("<sep> ", endEnd + 1):
+            raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+
+        # find the end of the machine string
+        if toEnd:
+            end = len(string)
+        else:
+            closingBegin = string.find("</", tagEnd + 1)
+            end = -1 if closingBegin == -1 else string.find(">", closingBegin + 3) + 1
+            if end <= 0:
+                raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+
+        # the new tokens are each followed by a single space, and end where the closing tag begins
+        tokensBegin = endEnd + len(" <sep> ")
+        closingTag = "</" + tag + ">"
+        tokensEnd = end - len(closingTag)
+        if tokensEnd < tokensBegin or not string.startswith(closingTag, tokensEnd):
+            raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+
+        newTokens = string[tokensBegin : tokensEnd]
+        if newTokens != "" and (newTokens[0] == " " or newTokens[-1] != " " or "  " in newTokens):
+            raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+
+        # any other whitespace surrounding the new tokens is stripped
+        newTokens = newTokens.strip().split(" ")
+        if newTokens == [""]:
+            newTokens = []
+
+        operation = CompoundOperation.__fromMachineStringParts(tag, beginIndex, endIndex, newTokens, string, previousEnd)
+
+        return operation, end
+
+    def __parseSpacedMachineStrings(string: str) -> List["CompoundOperation"]:
+        """
+        Parses the given `string` of machine strings like `ListFromMachineString`, but only if its machine strings are
+        separated by single spaces and contain no whitespace other than single spaces, as in the files written by
+        `writeCompoundOperationsToFile`. Every part of such a string is one of the space-separated pieces of the
+        string, so parsing the pieces is much faster than parsing the string one character at a time. Raises a
+        `ValueError` if the string is not of this format, even if it is valid.
+        """
+
+        string = string.strip()
+        pieces = string.split(" ")
+
+        if string == "":
+            return []
+
+        # other whitespace, repeated spaces, or tags inside tokens would have to be parsed one character at a time
+        if not string.isprintable() or "" in pieces:
+            raise ValueError("CompoundOperation: machine strings are not separated by single spaces")
+
+        operations = []
+        previousEnd = 0
+        i = 0
+
+        while i < len(pieces):
+
+            tag = pieces[i][1:-1]
+            if pieces[i] != "<" + tag + ">" or tag not in ("op", "ins", "del", "rep", "rel") or len(pieces) < i + 5:
+                raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+
+            # the new tokens end at the closing tag, which raises a ValueError if there is none
+            tokensEnd = pieces.index("</" + tag + ">", i + 4)
+            if pieces[i + 3] != "<sep>":
+                raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+
+            operation = CompoundOperation.__fromMachineStringParts(
+                    tag, pieces[i + 1], pieces[i + 2], pieces[i + 4 : tokensEnd], string, previousEnd)
+            operations.append(operation)
+            previousEnd = operation.__beginIndex + len(operation.__newTokens)
+            i = tokensEnd + 1
+
+        # each closing tag contains exactly one "</", so any other occurrence is inside a token
+        if string.count("</") != len(operations):
+            raise ValueError("CompoundOperation: machine string tokens contain closing tags")
+
+        return operations
+
+    def __fromMachineStringParts(
+        tag: str,
+        beginIndex: str,
+        endIndex: str,
+        newTokens: List[str],
+        string: str,
+        previousEnd: int = 0
+    ) -> "CompoundOperation":
+        """
+        Returns the `CompoundOperation` with the given parts of a machine string. Raises a `ValueError` mentioning the
+        given machine `string` if the parts are invalid. The indices of relative form are relative to `previousEnd`.
+        """
+
+        if not beginIndex.isdecimal() or not endIndex.isdecimal():
+            raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+
+        # build the compound operation directly from its attributes
+        operation = object.__new__(CompoundOperation)
+        operation.__beginIndex = int(beginIndex)
+        operation.__endIndex = int(endIndex)
+        operation.__newTokens = newTokens
+
+        # relative form gives the number of tokens after previousEnd and the number of deleted tokens instead
+        if tag == "rel":
+            operation.__beginIndex += previousEnd
+            operation.__endIndex += operation.__beginIndex
+
+        # make sure endIndex is at least beginIndex
+        if not operation.__endIndex >= operation.__beginIndex:
+            raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+
+        operation.__setType()
+
+        # make sure that if the machine string was of typed form, that the resulting CompoundOperation has the same type
+        _type = {"op": None, "rel": None, "ins": InsertOperation, "del": DeleteOperation, "rep": ReplaceOperation}[tag]
+        if _type is not None and _type != operation.getType():
+            raise ValueError("CompoundOperation: invalid machine string: '{}'".format(string))
+
+        return operation
+
     def __setType(self) -> None:
         """
         Sets the type based on the index range and the tokens to be inserted.
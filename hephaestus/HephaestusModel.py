@@ -1,16 +1,23 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: nbs/05_HephaestusModel.ipynb (unless otherwise specified).
 
-__all__ = ['HephaestusModel']
+__all__ = ['TranslationCache', 'HephaestusModel']
 
 # Cell
 #hide
-from typing import Union, List, Optional, Tuple
+from typing import Union, List, Optional, Tuple, Dict
 import os
 import subprocess
 import re
+import pickle
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from itertools import accumulate
+from bisect import bisect_left
 import torch
 import pandas as pd
-from copy import deepcopy
 
 import sys
 sys.path.append("..")
@@ -21,6 +28,265 @@ from .AbstractMethod import *
 from .IOUtils import *
 from .DatasetConstruction import *
 
+# Cell
+class TranslationCache:
+    """
+    Caches the methods translated by `HephaestusModel.translate`, such that methods which were translated before are
+    not translated again; see `HephaestusModel.setTranslationCache`. Translations are keyed by the contents of the
+    model file, whether edit operations were applied, and the tokens of the buggy method, so a cache can be shared by
+    several models and remains valid when a model file is overwritten. The least recently used translations are
+    evicted once there are too many. Several processes may use the same cache file at once, since the cache file is
+    only read and written in transactions which lock it.
+
+    Optional args:
+    - `cacheFile`: An SQLite database file which stores the translations across processes, behind the translations
+      kept in memory. Defaults to None, which only keeps translations in memory.
+    - `maxMemoryEntries`: The number of translations kept in memory. Defaults to 100000.
+    - `maxFileEntries`: The number of translations stored in `cacheFile`. Defaults to 10000000.
+    """
+
+    def __init__(
+        self,
+        cacheFile: Optional[str] = None,
+        maxMemoryEntries: int = 100000,
+        maxFileEntries: int = 10000000
+    ) -> None:
+
+        if maxMemoryEntries < 0:
+            raise ValueError("TranslationCache: maxMemoryEntries must not be negative, got {}".format(repr(maxMemoryEntries)))
+        if maxFileEntries < 0:
+            raise ValueError("TranslationCache: maxFileEntries must not be negative, got {}".format(repr(maxFileEntries)))
+
+        self.__maxMemoryEntries = maxMemoryEntries
+        self.__maxFileEntries = maxFileEntries
+        self.__lock = threading.Lock()
+        self.__modelHashes = {}
+        self.__entries = OrderedDict()
+        self.__stats = {"hits": 0, "misses": 0, "memoryEvictions": 0, "fileEvictions": 0}
+
+        # each row stores the tokens of a fixed method, or null if it couldn't be translated, and when it was last used
+        self.__connection = None
+        if cacheFile is not None:
+            self.__connection = sqlite3.connect(cacheFile, timeout = 60, check_same_thread = False)
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS translations (key BLOB PRIMARY KEY, tokens TEXT, lastUsed INTEGER)"
+            )
+            self.__connection.execute("CREATE INDEX IF NOT EXISTS translationsLastUsed ON translations (lastUsed)")
+
+            # the number of rows is kept in a table of its own, since counting them scans the whole cache file
+            with self.__connection:
+                self.__connection.execute("BEGIN IMMEDIATE")
+                self.__connection.execute("CREATE TABLE IF NOT EXISTS translationCount (numEntries INTEGER)")
+                self.__connection.execute(
+                    "INSERT INTO translationCount SELECT COUNT(*) FROM translations "
+                    "WHERE NOT EXISTS (SELECT * FROM translationCount)"
+                )
+
+    def getStats(self) -> Dict[str, int]:
+        """
+        Returns the number of `hits` and `misses` of all lookups, the number of translations evicted from memory and
+        from the cache file (`memoryEvictions` and `fileEvictions`), and the number of translations currently kept in
+        memory and in the cache file (`memoryEntries` and `fileEntries`).
+        """
+
+        with self.__lock:
+            return dict(
+                self.__stats,
+                memoryEntries = len(self.__entries),
+                fileEntries = 0 if self.__connection is None else self.__countFileEntries()
+            )
+
+    def lookup(
+        self,
+        modelFile: str,
+        applyEditOperations: bool,
+        methods: List[AbstractMethod]
+    ) -> Tuple[List[Optional[AbstractMethod]], List[int]]:
+        """
+        Looks up the translations of the given buggy `methods` by the model in `modelFile`. Returns the fixed methods,
+        and the indices of the methods which are not cached, whose fixed methods are None.
+        """
+
+        keys = self.__getKeys(modelFile, applyEditOperations, methods)
+        fixedMethods = [None] * len(methods)
+        missing = []
+
+        with self.__lock:
+
+            # look up the keys in memory first, then look up the remaining keys in the cache file
+            fileKeys = []
+            for i, key in enumerate(keys):
+                if key in self.__entries:
+                    self.__entries.move_to_end(key)
+                    fixedMethods[i] = TranslationCache.__getFixedMethod(self.__entries[key])
+                else:
+                    fileKeys.append(i)
+
+            fileEntries = self.__lookupFile([keys[i] for i in fileKeys])
+            for i in fileKeys:
+                if keys[i] in fileEntries:
+                    tokens = fileEntries[keys[i]]
+                    self.__addToMemory(keys[i], tokens)
+                    fixedMethods[i] = TranslationCache.__getFixedMethod(tokens)
+                else:
+                    missing.append(i)
+
+            self.__stats["hits"] += len(methods) - len(missing)
+            self.__stats["misses"] += len(missing)
+
+        return fixedMethods, missing
+
+    def add(
+        self,
+        modelFile: str,
+        applyEditOperations: bool,
+        methods: List[AbstractMethod],
+        fixedMethods: List[Optional[AbstractMethod]]
+    ) -> None:
+        """
+        Caches the given `fixedMethods`, which are the translations of the buggy `methods` by the model in `modelFile`.
+        """
+
+        keys = self.__getKeys(modelFile, applyEditOperations, methods)
+        entries = dict(zip(keys, (None if method is None else " ".join(method.getTokens()) for method in fixedMethods)))
+
+        with self.__lock:
+
+            for key, tokens in entries.items():
+                self.__addToMemory(key, tokens)
+
+            if self.__connection is not None and self.__maxFileEntries > 0:
+                with self.__connection:
+                    lastUsed = self.__beginFileTransaction()
+                    numNewEntries = len(entries) - self.__countFileKeys(list(entries))
+                    self.__connection.executemany(
+                        "INSERT OR REPLACE INTO translations VALUES (?, ?, ?)",
+                        [(key, tokens, lastUsed) for key, tokens in entries.items()]
+                    )
+                    self.__addFileEntries(numNewEntries)
+
+                    # evict the least recently used translations if there are too many, including the ones which other
+                    # processes added
+                    numEvictions = self.__countFileEntries() - self.__maxFileEntries
+                    if numEvictions > 0:
+                        self.__connection.execute(
+                            "DELETE FROM translations WHERE key IN "
+                            "(SELECT key FROM translations ORDER BY lastUsed, rowid LIMIT ?)",
+                            (numEvictions,)
+                        )
+                        self.__addFileEntries(-numEvictions)
+                        self.__stats["fileEvictions"] += numEvictions
+
+    def clear(self) -> None:
+        """
+        Removes all translations from memory and from the cache file. The statistics are kept.
+        """
+
+        with self.__lock:
+            self.__entries.clear()
+            if self.__connection is not None:
+                with self.__connection:
+                    self.__connection.execute("DELETE FROM translations")
+                    self.__connection.execute("UPDATE translationCount SET numEntries = 0")
+
+    def close(self) -> None:
+        """
+        Closes the cache file; the translations in memory can still be used.
+        """
+
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+                self.__connection = None
+
+    def __getKeys(self, modelFile: str, applyEditOperations: bool, methods: List[AbstractMethod]) -> List[bytes]:
+
+        prefix = "{}\n{}\n".format(self.__getModelHash(modelFile), int(applyEditOperations)).encode("utf-8")
+        return [hashlib.sha256(prefix + " ".join(method.getTokens()).encode("utf-8")).digest() for method in methods]
+
+    def __getModelHash(self, modelFile: str) -> str:
+
+        # model files are large, so they are only hashed again once they change
+        stat = os.stat(modelFile)
+        fileKey = (os.path.abspath(modelFile), stat.st_size, stat.st_mtime_ns)
+
+        with self.__lock:
+            modelHash = self.__modelHashes.get(fileKey)
+        if modelHash is not None:
+            return modelHash
+
+        digest = hashlib.sha256()
+        with open(modelFile, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+
+        with self.__lock:
+            self.__modelHashes[fileKey] = digest.hexdigest()
+        return digest.hexdigest()
+
+    def __lookupFile(self, keys: List[bytes]) -> Dict[bytes, Optional[str]]:
+
+        if self.__connection is None or len(keys) == 0:
+            return {}
+
+        # look up the keys in batches to stay below the limit of SQLite variables, and mark them as used
+        entries = {}
+        with self.__connection:
+            lastUsed = self.__beginFileTransaction()
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                placeholders = ", ".join("?" * len(batch))
+                entries.update(self.__connection.execute(
+                    "SELECT key, tokens FROM translations WHERE key IN ({})".format(placeholders), batch
+                ).fetchall())
+                self.__connection.execute(
+                    "UPDATE translations SET lastUsed = ? WHERE key IN ({})".format(placeholders),
+                    [lastUsed] + batch
+                )
+
+        return entries
+
+    def __beginFileTransaction(self) -> int:
+
+        # lock the cache file for writing before reading it, such that the translations used last by other processes
+        # are seen, and return the next time of use
+        self.__connection.execute("BEGIN IMMEDIATE")
+        lastUsed, = self.__connection.execute("SELECT MAX(lastUsed) FROM translations").fetchone()
+        return 1 if lastUsed is None else lastUsed + 1
+
+    def __countFileEntries(self) -> int:
+
+        return self.__connection.execute("SELECT numEntries FROM translationCount").fetchone()[0]
+
+    def __addFileEntries(self, numEntries: int) -> None:
+
+        self.__connection.execute("UPDATE translationCount SET numEntries = numEntries + ?", (numEntries,))
+
+    def __countFileKeys(self, keys: List[bytes]) -> int:
+
+        # count the keys in batches to stay below the limit of SQLite variables, like __lookupFile
+        numKeys = 0
+        for start in range(0, len(keys), 500):
+            batch = keys[start : start + 500]
+            numKeys += self.__connection.execute(
+                "SELECT COUNT(*) FROM translations WHERE key IN ({})".format(", ".join("?" * len(batch))), batch
+            ).fetchone()[0]
+
+        return numKeys
+
+    def __addToMemory(self, key: bytes, tokens: Optional[str]) -> None:
+
+        self.__entries[key] = tokens
+        self.__entries.move_to_end(key)
+
+        while len(self.__entries) > self.__maxMemoryEntries:
+            self.__entries.popitem(last = False)
+            self.__stats["memoryEvictions"] += 1
+
+    def __getFixedMethod(tokens: Optional[str]) -> Optional[AbstractMethod]:
+        # a new method is created for every lookup, since methods can be modified
+        return None if tokens is None else AbstractMethod(tokens)
+
 # Cell
 class HephaestusModel:
     """
@@ -34,6 +300,11 @@ class HephaestusModel:
       will attempt to create it.
     """
 
+    # columns of the dataframe returned by getTrainingStats, and the patterns of the lines they are parsed from
+    __TRAINING_STATS_COLUMNS = ("step", "trainAccuracy", "validAccuracy", "crossEntropy")
+    __TRAINING_STEP_PATTERN = re.compile(r"^\[[^\]]*INFO\] *Step *(\d+)/ *\d+; *acc: *(.+?);.+?xent: *(.+?);")
+    __VALIDATION_PATTERN = re.compile(r"^\[[^\]]*INFO\] *Validation accuracy: *((?:\d+\.)?\d+)")
+
     def __init__(self, modelDir: str) -> None:
 
         # set up constants
@@ -43,6 +314,7 @@ class HephaestusModel:
         self.__SOURCE_VOCAB_PATH = os.path.join(self.__MODEL_DIR, "save_data.vocab.src")
         self.__TARGET_VOCAB_PATH = os.path.join(self.__MODEL_DIR, "save_data.vocab.tgt")
         self.__TRAIN_OUTPUT_PATH = os.path.join(self.__MODEL_DIR, "train_output.txt")
+        self.__TRAIN_STATS_PATH =  os.path.join(self.__MODEL_DIR, "train_stats.pkl")
         self.__RAW_OUTPUT_PATH =   os.path.join(self.__MODEL_DIR, "raw_output.txt")
         self.__POST_OUTPUT_PATH =  os.path.join(self.__MODEL_DIR, "postprocessed_output.txt")
         self.__SAVE_MODEL_PREFIX = "model"
@@ -53,6 +325,14 @@ class HephaestusModel:
         if not os.path.isdir(self.__MODEL_DIR):
             os.makedirs(self.__MODEL_DIR)
 
+        # the resident translator, see loadTranslator
+        self.__translator = None
+        self.__translatorModelFile = None
+        self.__translatorOptions = None
+
+        # the cache of translated methods, see setTranslationCache
+        self.__translationCache = None
+
     def train(self,
 
         trainSource: str,
@@ -126,10 +406,8 @@ class HephaestusModel:
             if re.search(r"^" + self.__SAVE_MODEL_PREFIX + r"_(?:step_[0-9]+|final).pt$", file):
                 os.remove(os.path.join(self.__MODEL_DIR, file))
 
-        # train the model and write output to the appropriate file
-        trainOutput = runCommand('onmt_train -config "{}"'.format(self.__CONFIG_PATH))
-        with open(self.__TRAIN_OUTPUT_PATH, "w") as f:
-            f.write(trainOutput)
+        # train the model and write output to the appropriate file as it is printed
+        runCommand('onmt_train -config "{}"'.format(self.__CONFIG_PATH), self.__TRAIN_OUTPUT_PATH)
 
         # find and release the highest trained model
         latestModel = None
@@ -153,42 +431,57 @@ class HephaestusModel:
         - `trainAccuracy`: Model accuracy with respect to the **training** set
         - `validAccuracy`: Validation accuracy. These values will likely not be present for every row.
         - `crossEntropy`: Cross-entropy value
-        """
 
-        # create empty dataframe and initialize trainStep value
-        frame = pd.DataFrame(columns = ["step", "trainAccuracy", "validAccuracy", "crossEntropy"])
-        trainStep = -1
+        The statistics parsed from the training output are cached in `<model_directory>/train_stats.pkl`, along with
+        the size and modification time of the training output. Later calls only parse the lines which were appended to
+        the training output since, so the statistics of a model which is still training can be polled cheaply.
+        """
 
-        # read through lines of the training output file
-        with open(self.__TRAIN_OUTPUT_PATH, "r") as f:
+        stats = self.__loadTrainingStats()
+        outputStat = os.stat(self.__TRAIN_OUTPUT_PATH)
+        newStats = stats
 
-            for line in f:
+        outputChanged = (stats["size"], stats["mtime"]) != (outputStat.st_size, outputStat.st_mtime_ns)
+        if outputChanged or stats["offset"] < outputStat.st_size:
 
-                line = line.strip()
+            with open(self.__TRAIN_OUTPUT_PATH, "rb") as f:
 
-                # attempt to match against a line that has training accuracy and the like
-                match = re.search(r"^\[[^\]]*INFO\] *Step *(\d+)/ *\d+; *acc: *(.+?);.+?xent: *(.+?);", line)
-                if match:
+                # start over if the parsed part of the training output was replaced, e.g. by training again
+                f.seek(max(stats["offset"] - len(stats["tail"]), 0))
+                if stats["offset"] > outputStat.st_size or f.read(len(stats["tail"])) != stats["tail"]:
+                    stats = HephaestusModel.__getEmptyTrainingStats()
+                    f.seek(0)
 
-                    trainStep = int(match.group(1))
-                    accuracy = float(match.group(2))
-                    xEntropy = float(match.group(3))
+                data = f.read()
 
-                    frame.loc[len(frame)] = [trainStep, accuracy, None, xEntropy]
+            # only complete lines are cached, since the last line may still be written to; it is parsed again until
+            # it is complete
+            end = data.rfind(b"\n") + 1
+            HephaestusModel.__parseTrainingOutput(data[:end].decode(errors = "replace"), stats)
+            stats["size"], stats["mtime"] = outputStat.st_size, outputStat.st_mtime_ns
+            stats["tail"] = (stats["tail"] + data[:end])[-256:]
+            stats["offset"] += end
+            self.__saveTrainingStats(stats)
 
-                # attmpt to match against a line that has validation accuracy info
-                match = re.search(r"^\[[^\]]*INFO\] *Validation accuracy: *((?:\d+\.)?\d+)", line)
-                if match and trainStep > 0:
-                    frame.at[len(frame) - 1, "validAccuracy"] = float(match.group(1))
+            newStats = stats
+            if end < len(data):
+                newStats = {key: list(value) if type(value) is list else value for key, value in stats.items()}
+                HephaestusModel.__parseTrainingOutput(data[end:].decode(errors = "replace"), newStats)
 
-        # set the type of the "step" column to int, then return the frame
+        # create the dataframe from the columns, then set the type of the "step" column to int and the types of the
+        # other columns to float, such that missing validation accuracies are NaN, and return the frame
+        frame = pd.DataFrame({column: newStats[column] for column in HephaestusModel.__TRAINING_STATS_COLUMNS})
+        frame = frame.astype({column: float for column in HephaestusModel.__TRAINING_STATS_COLUMNS})
         frame["step"] = frame["step"].astype(int)
         return frame
 
     def translate(self,
         buggy: Union[str, AbstractMethod, List[AbstractMethod]],
         modelFile: str = None,
-        applyEditOperations: bool = True
+        applyEditOperations: bool = True,
+        workers: Optional[int] = 1,
+        batchSize: int = 30,
+        batchType: str = "sents"
     ) -> Union[Optional[AbstractMethod], List[Optional[AbstractMethod]]]:
         """
         Translates the given `buggy` AbstractMethods into supposedly fixed AbstractMethods, writes them to
@@ -215,6 +508,24 @@ class HephaestusModel:
           `postprocessed_output.txt` are identical. If the model was trained with EditOperations,
           `applyEditOperations` should be True; if the model was trained with just AbstractMethods as in for
           the control group, then this should be False. Defaults to True.
+        - `workers`: The number of `onmt_translate` processes which translate the methods concurrently, each in a
+          shard of the methods with about the same number of tokens, and each with an equal share of the CPU cores
+          as its number of threads. None uses a process per CPU core. Defaults to 1.
+        - `batchSize`: The size of the batches which the methods are translated in. Defaults to 30.
+        - `batchType`: Either `"sents"`, in which case `batchSize` is the number of methods in a batch, or `"tokens"`,
+          in which case it is the number of tokens in a batch, including padding. Defaults to `"sents"`.
+
+        The methods are translated in the order of their lengths, such that each batch contains methods of about the
+        same length, which need little padding; `input.txt` contains the methods in this order, one per line with their
+        tokens separated by spaces, so the lines of a buggy file are translated as they are. All outputs are in the
+        order of the inputted methods.
+
+        If the translator for the model file was loaded with `loadTranslator`, the methods are translated in this
+        process by that translator, and neither `input.txt` nor `raw_output.txt` are written. The fixed methods are the
+        same as when running `onmt_translate`.
+
+        If a `TranslationCache` was set with `setTranslationCache`, only the methods which are not cached are
+        translated, and `raw_output.txt` only contains their raw output.
         """
 
         # determine which model file to use, and raise an error if it doesn't exist
@@ -223,71 +534,333 @@ class HephaestusModel:
         if not os.path.isfile(modelFile):
             raise FileNotFoundError("HephaestusModel: model not found -- {}".format(modelFile))
 
-        # write the AbstractMethods to a file if they were given directly
-        buggyFile = None
-        if type(buggy) in (AbstractMethod, list):
-            buggyFile = os.path.join(self.__MODEL_DIR, "input.txt")
-            writeAbstractMethodsToFile(buggyFile, buggy if type(buggy) is list else [buggy])
-        else:
-            buggyFile = buggy
-
-        # translate the buggy methods
-        command = 'onmt_translate -model "{}" -src "{}" -output "{}"'.format(modelFile, buggyFile, self.__RAW_OUTPUT_PATH)
-        if getYamlParameter(self.__CONFIG_PATH, "world_size") is not None: # if GPU should be used
-            command += " --gpu 0"
-        runCommand(command)
-
-        # strip the last line of the output file because OpenNMT likes to put a newline at the end
-        with open(self.__RAW_OUTPUT_PATH, "r+") as outputFile:
-            lines = outputFile.readlines()
-            lines[-1] = lines[-1].strip()
-            outputFile.seek(0)
-            outputFile.writelines(lines)
-            outputFile.truncate()
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("HephaestusModel: workers must be at least 1, got {}".format(repr(workers)))
+        if batchSize < 1:
+            raise ValueError("HephaestusModel: batchSize must be at least 1, got {}".format(repr(batchSize)))
+        if batchType not in ("sents", "tokens"):
+            raise ValueError("HephaestusModel: unknown batchType {}".format(repr(batchType)))
 
         # get all inputted AbstractMethods
         inputMethods = []
         if type(buggy) in (AbstractMethod, list):
             inputMethods = buggy if type(buggy) is list else [buggy]
         else:
-            inputMethods = readAbstractMethodsFromFile(buggyFile)
+            inputMethods = readAbstractMethodsFromFile(buggy)
+
+        # look up the methods in the translation cache, such that only the missing ones are translated
+        fixedMethods = [None] * len(inputMethods)
+        missing = list(range(len(inputMethods)))
+        if self.__translationCache is not None:
+            fixedMethods, missing = self.__translationCache.lookup(modelFile, applyEditOperations, inputMethods)
+
+        if len(missing) > 0:
+            missingMethods = [inputMethods[i] for i in missing]
+            missingFixedMethods = self.__translateMethods(
+                missingMethods,
+                modelFile,
+                applyEditOperations,
+                workers,
+                batchSize,
+                batchType
+            )
+            for i, fixedMethod in zip(missing, missingFixedMethods):
+                fixedMethods[i] = fixedMethod
+
+        if self.__translationCache is not None and len(missing) > 0:
+            self.__translationCache.add(
+                modelFile,
+                applyEditOperations,
+                [inputMethods[i] for i in missing],
+                [fixedMethods[i] for i in missing]
+            )
+
+        # write the fixed methods to the postprocessed output file, substituting null methods with blank lines
+        writeAbstractMethodsToFile(
+            self.__POST_OUTPUT_PATH,
+            [" " if method is None else method for method in fixedMethods]
+        )
+
+        # return fixed methods
+        return fixedMethods if type(buggy) is list else fixedMethods[0]
+
+    def setTranslationCache(self, cache: Optional[TranslationCache]) -> None:
+        """
+        Sets the `TranslationCache` which `translate` looks up methods in before translating them, and which it adds
+        the translated methods to. A cache can be shared by several models. Setting None disables caching.
+        """
 
-        # If edit ops should be applied, then extract the operations from the output file and attempt to
+        self.__translationCache = cache
+
+    def __translateMethods(
+        self,
+        inputMethods: List[AbstractMethod],
+        modelFile: str,
+        applyEditOperations: bool,
+        workers: int,
+        batchSize: int,
+        batchType: str
+    ) -> List[Optional[AbstractMethod]]:
+        """
+        Translates the given `inputMethods` with the options given to `translate`, and returns the fixed methods.
+        """
+
+        # Sort the methods by length, such that the batches contain methods of about the same length, rather than
+        # short methods which are padded to the length of long ones. Sorting is stable, so equal methods stay in order.
+        order = sorted(range(len(inputMethods)), key = lambda i: len(inputMethods[i]))
+        sortedMethods = [inputMethods[i] for i in order]
+
+        # translate the sorted methods into lines of raw output
+        resident = self.__translator is not None and self.__translatorModelFile == modelFile
+        if resident:
+            sortedOutput = self.__translateResident(sortedMethods, batchSize, batchType)
+        elif workers > 1 and len(inputMethods) > 1:
+            sortedOutput = self.__translateShards(sortedMethods, modelFile, workers, batchSize, batchType)
+        else:
+            sortedOutput = self.__translateCommand(sortedMethods, modelFile, batchSize, batchType)
+
+        # Make sure the number of outputs equals the number of inputted methods -- this can differ if the
+        # model fails to translate one of the inputs.
+        numFails = len(inputMethods) - len(sortedOutput)
+        if numFails > 0:
+            raise RuntimeError("HephaestusModel: failed to translate {} input(s)".format(numFails))
+
+        # restore the order of the inputted methods, also in the raw output file
+        rawOutput = [None] * len(inputMethods)
+        for sortedIndex, i in enumerate(order):
+            rawOutput[i] = sortedOutput[sortedIndex].rstrip("\n")
+
+        if not resident and order != list(range(len(order))):
+            with open(self.__RAW_OUTPUT_PATH, "w") as outputFile:
+                outputFile.write("\n".join(rawOutput))
+
+        # If edit ops should be applied, then extract the operations from the raw output and attempt to
         # apply them to the input methods. Assign a None value to a fixed method if its corresponding
         # operations were not able to be read, or if the operations are illegal (i.e. modifies out of bounds
-        # tokens). Copy input methods before applying edit operations so that the original remains unmodified.
+        # tokens). Edit scripts build new methods, so the input methods remain unmodified.
         fixedMethods = []
         if applyEditOperations:
-            operations = readCompoundOperationsFromFile(self.__RAW_OUTPUT_PATH)
-            for inputMethod, opList in zip(inputMethods, operations):
-                if opList is None:
+            for inputMethod, line in zip(inputMethods, rawOutput):
+                try:
+                    fixedMethods.append(EditScript(CompoundOperation.ListFromMachineString(line)).apply(inputMethod))
+                except (ValueError, IndexError) as e:
                     fixedMethods.append(None)
-                else:
-                    try:
-                        inputMethodCopy = deepcopy(inputMethod)
-                        inputMethodCopy.applyEditOperations(opList)
-                        fixedMethods.append(inputMethodCopy)
-                    except IndexError as e:
-                        fixedMethods.append(None)
 
         # Simply interpret the output as abstract methods if not interpreting as edit operations
         else:
-            fixedMethods = readAbstractMethodsFromFile(self.__RAW_OUTPUT_PATH)
+            fixedMethods = [AbstractMethod(line.strip()) for line in rawOutput]
 
-        # Make sure the number of fixed methods equals the number of inputted methods -- this can differ if the
-        # model fails to translate one of the inputs.
-        numFails = len(inputMethods) - len(fixedMethods)
-        if numFails > 0:
-            raise RuntimeError("HephaestusModel: failed to translate {} input(s)".format(numFails))
+        return fixedMethods
 
-        # write the fixed methods to the postprocessed output file, substituting null methods with blank lines
-        writeAbstractMethodsToFile(
-            self.__POST_OUTPUT_PATH,
-            [" " if method is None else method for method in fixedMethods]
+    def loadTranslator(self, modelFile: str = None) -> None:
+        """
+        Loads the model into an OpenNMT translator which stays in memory, such that later calls of `translate` with the
+        same model file translate in this process, rather than running `onmt_translate`, which loads the model again
+        every time. The translator uses the same options as `onmt_translate` does in `translate`, so the translations
+        are the same. Loading another model file replaces the translator; `unloadTranslator` frees it.
+
+        Optional args:
+        - `modelFile`: A `.pt` file which is loaded instead of the default `model_final.pt`
+        """
+
+        if modelFile is None:
+            modelFile = self.__FINAL_MODEL_PATH
+        if not os.path.isfile(modelFile):
+            raise FileNotFoundError("HephaestusModel: model not found -- {}".format(modelFile))
+
+        # OpenNMT is otherwise only run as a command, so it is only imported when it is needed here
+        import onmt.opts
+        from onmt.translate.translator import build_translator
+        from onmt.utils.parse import ArgumentParser
+
+        # parse the same options as the command in translate; the source is given to the translator directly
+        args = ["-model", modelFile, "-src", os.devnull]
+        if getYamlParameter(self.__CONFIG_PATH, "world_size") is not None: # if GPU should be used
+            args += ["-gpu", "0"]
+
+        parser = ArgumentParser()
+        onmt.opts.config_opts(parser)
+        onmt.opts.translate_opts(parser)
+        options = parser.parse_args(args)
+        ArgumentParser.validate_translate_opts(options)
+
+        self.unloadTranslator()
+        self.__translator = build_translator(options, report_score = False, out_file = open(os.devnull, "w"))
+        self.__translatorModelFile = modelFile
+        self.__translatorOptions = options
+
+    def unloadTranslator(self) -> None:
+        """
+        Frees the translator loaded by `loadTranslator`, such that `translate` runs `onmt_translate` again.
+        """
+
+        if self.__translator is not None:
+            self.__translator.out_file.close()
+
+        self.__translator = None
+        self.__translatorModelFile = None
+        self.__translatorOptions = None
+
+    def __translateCommand(
+        self,
+        inputMethods: List[AbstractMethod],
+        modelFile: str,
+        batchSize: int,
+        batchType: str
+    ) -> List[str]:
+        """
+        Translates the given `inputMethods` by writing them to `input.txt` and running `onmt_translate` with the given
+        `modelFile`, `batchSize` and `batchType`. Returns the lines of `raw_output.txt`.
+        """
+
+        # write the tokens of each method separated by spaces, such that a buggy file is given to onmt_translate line
+        # for line, rather than the escaped `str` of each method
+        inputFile = os.path.join(self.__MODEL_DIR, "input.txt")
+        with openFile(inputFile, "w") as f:
+            f.write("\n".join(" ".join(method.getTokens()) for method in inputMethods))
+
+        # translate the buggy methods
+        runCommand(self.__getTranslateCommand(modelFile, inputFile, self.__RAW_OUTPUT_PATH, batchSize, batchType))
+
+        # strip the last line of the output file because OpenNMT likes to put a newline at the end
+        with open(self.__RAW_OUTPUT_PATH, "r+") as outputFile:
+            lines = outputFile.readlines()
+            lines[-1] = lines[-1].strip()
+            outputFile.seek(0)
+            outputFile.writelines(lines)
+            outputFile.truncate()
+
+        return lines
+
+    def __translateShards(
+        self,
+        inputMethods: List[AbstractMethod],
+        modelFile: str,
+        workers: int,
+        batchSize: int,
+        batchType: str
+    ) -> List[str]:
+        """
+        Translates the given `inputMethods` by splitting them into at most `workers` shards of consecutive methods with
+        about the same number of tokens, and running `onmt_translate` with the given `modelFile`, `batchSize` and
+        `batchType` on each shard concurrently. Each shard has its own `input_<shard>.txt` and `raw_output_<shard>.txt`
+        files, which are removed once their raw output is merged into `raw_output.txt`. Returns its lines. If any shard
+        fails, the other shards are cancelled and a `subprocess.CalledProcessError` is raised.
+        """
+
+        # give each shard the tokens of its methods separated by spaces, as the resident translator is given them
+        sourceLines = [" ".join(method.getTokens()) for method in inputMethods]
+
+        # a shard ends at the first method whose cumulative number of tokens reaches its share of the tokens
+        numShards = min(workers, len(inputMethods))
+        cumulativeTokens = list(accumulate(len(method) for method in inputMethods))
+        ends = [
+            bisect_left(cumulativeTokens, cumulativeTokens[-1] * shard / numShards) + 1 for shard in range(1, numShards)
+        ]
+        bounds = sorted(set([0] + ends + [len(inputMethods)]))
+
+        # torch would use every core in each process, so the cores are divided between the processes instead
+        numThreads = str(max(1, (os.cpu_count() or 1) // (len(bounds) - 1)))
+        env = {"OMP_NUM_THREADS": numThreads, "MKL_NUM_THREADS": numThreads}
+
+        shardFiles = []
+        runningCommands = []
+        try:
+            for shard, (start, stop) in enumerate(zip(bounds, bounds[1:])):
+                shardInputFile = os.path.join(self.__MODEL_DIR, "input_{}.txt".format(shard))
+                shardOutputFile = os.path.join(self.__MODEL_DIR, "raw_output_{}.txt".format(shard))
+                shardFiles += [shardInputFile, shardOutputFile]
+
+                with openFile(shardInputFile, "w") as f:
+                    f.write("\n".join(sourceLines[start:stop]))
+
+                command = self.__getTranslateCommand(modelFile, shardInputFile, shardOutputFile, batchSize, batchType)
+                runningCommands.append((command, RunningCommand(command, env = env)))
+
+            # poll the shards instead of waiting for them in order, such that the other shards are cancelled as soon
+            # as any of them fails
+            pendingCommands = list(runningCommands)
+            while len(pendingCommands) > 0:
+                for command, runningCommand in list(pendingCommands):
+                    if runningCommand.isRunning():
+                        continue
+                    pendingCommands.remove((command, runningCommand))
+                    exitCode = runningCommand.wait()
+                    if exitCode != 0:
+                        raise subprocess.CalledProcessError(exitCode, command, runningCommand.getOutput())
+                if len(pendingCommands) > 0:
+                    time.sleep(0.05)
+
+            # merge the raw output of the shards in order, without the newline which OpenNMT puts at the end
+            lines = []
+            for shardOutputFile in shardFiles[1::2]:
+                with open(shardOutputFile) as f:
+                    output = f.read()
+                lines += (output[:-1] if output.endswith("\n") else output).split("\n")
+
+        except BaseException:
+            for _, runningCommand in runningCommands:
+                runningCommand.cancel()
+            raise
+
+        finally:
+            for shardFile in shardFiles:
+                if os.path.isfile(shardFile):
+                    os.remove(shardFile)
+
+        with open(self.__RAW_OUTPUT_PATH, "w") as outputFile:
+            outputFile.write("\n".join(lines))
+
+        return lines
+
+    def __getTranslateCommand(
+        self,
+        modelFile: str,
+        sourceFile: str,
+        outputFile: str,
+        batchSize: int,
+        batchType: str
+    ) -> str:
+
+        command = 'onmt_translate -model "{}" -src "{}" -output "{}" -batch_size {} -batch_type {}'.format(
+            modelFile,
+            sourceFile,
+            outputFile,
+            batchSize,
+            batchType
         )
+        if getYamlParameter(self.__CONFIG_PATH, "world_size") is not None: # if GPU should be used
+            command += " --gpu 0"
 
-        # return fixed methods
-        return fixedMethods if type(buggy) is list else fixedMethods[0]
+        return command
+
+    def __translateResident(self, inputMethods: List[AbstractMethod], batchSize: int, batchType: str) -> List[str]:
+        """
+        Translates the given `inputMethods` with the translator loaded by `loadTranslator`, in batches of the given
+        `batchSize` and `batchType`. Returns the lines of raw output which `onmt_translate` would have written.
+        """
+
+        # give the translator the same lines which onmt_translate reads from the input file: the tokens of each method
+        # separated by spaces, as in the files the model was trained with, rather than the escaped `str` of the method
+        sourceLines = [" ".join(method.getTokens()) for method in inputMethods]
+
+        # onmt_translate translates the lines in shards, each of which is batched separately
+        options = self.__translatorOptions
+        shardSize = options.shard_size if options.shard_size > 0 else max(len(sourceLines), 1)
+        rawOutput = []
+
+        for i in range(0, len(sourceLines), shardSize):
+            _, predictions = self.__translator.translate(
+                src = sourceLines[i : i + shardSize],
+                batch_size = batchSize,
+                batch_type = batchType
+            )
+            for nBest in predictions:
+                rawOutput += nBest
+
+        return rawOutput
 
     def __writeConfigFile(self, **kwargs) -> None:
         """
@@ -402,4 +975,61 @@ class HephaestusModel:
         lines = lines[:16] + gpuLines + lines[16:]
 
         with open(self.__CONFIG_PATH, "w") as file:
-            file.write("\n".join(lines))
\ No newline at end of file
+            file.write("\n".join(lines))
+
+    def __getEmptyTrainingStats() -> dict:
+        """
+        Returns the training statistics of an empty training output, as cached by `getTrainingStats`: the columns of
+        the statistics, the step of the last training step line, the number of parsed bytes and the bytes just before
+        them, and the size and modification time of the training output.
+        """
+
+        stats = {column: [] for column in HephaestusModel.__TRAINING_STATS_COLUMNS}
+        stats.update(trainStep = -1, offset = 0, tail = b"", size = None, mtime = None)
+
+        return stats
+
+    def __parseTrainingOutput(text: str, stats: dict) -> None:
+        """
+        Parses the lines of the given `text` of training output, and appends the statistics on those lines to the
+        columns of the given `stats`.
+        """
+
+        for line in text.splitlines():
+
+            line = line.strip()
+
+            # attempt to match against a line that has training accuracy and the like
+            match = HephaestusModel.__TRAINING_STEP_PATTERN.search(line)
+            if match:
+
+                stats["trainStep"] = int(match.group(1))
+                stats["step"].append(stats["trainStep"])
+                stats["trainAccuracy"].append(float(match.group(2)))
+                stats["validAccuracy"].append(None)
+                stats["crossEntropy"].append(float(match.group(3)))
+
+            # attmpt to match against a line that has validation accuracy info
+            match = HephaestusModel.__VALIDATION_PATTERN.search(line)
+            if match and stats["trainStep"] > 0:
+                stats["validAccuracy"][-1] = float(match.group(1))
+
+    def __loadTrainingStats(self) -> dict:
+
+        try:
+            with open(self.__TRAIN_STATS_PATH, "rb") as f:
+                return pickle.load(f)
+
+        # parse the training output from the beginning if the cache is missing or unreadable
+        except Exception:
+            return HephaestusModel.__getEmptyTrainingStats()
+
+    def __saveTrainingStats(self, stats: dict) -> None:
+
+        # write to a temporary file first, such that an interrupted write does not leave an incomplete cache behind
+        try:
+            with open(self.__TRAIN_STATS_PATH + ".tmp", "wb") as f:
+                pickle.dump(stats, f)
+            os.replace(self.__TRAIN_STATS_PATH + ".tmp", self.__TRAIN_STATS_PATH)
+        except OSError:
+            pass
\ No newline at end of file
@@ -1,13 +1,31 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: nbs/03_IOUtils.ipynb (unless otherwise specified).
 
-__all__ = ['readAbstractMethodsFromFile', 'writeAbstractMethodsToFile', 'readCompoundOperationsFromFile',
-           'writeCompoundOperationsToFile', 'getYamlParameter', 'runCommand']
+__all__ = ['openFile', 'iterAbstractMethods', 'readAbstractMethodsFromFile', 'iterAbstractMethodPairs',
+           'writeAbstractMethodsToFile', 'writeAbstractMethodCorpus', 'makeAbstractMethodCorpus',
+           'AbstractMethodCorpus', 'iterCompoundOperations', 'readCompoundOperationsFromFile',
+           'writeCompoundOperationsToFile', 'LineIndex', 'getAbstractMethod', 'getRange', 'getAlignedRow',
+           'getYamlParameter', 'RunningCommand', 'runCommand', 'runCommandAsync']
 
 # Cell
 #hide
-from typing import List, Iterable, Optional
+from typing import Callable, Dict, List, Iterable, Iterator, Optional, Tuple, Union
+from collections import deque
+from itertools import islice, zip_longest
 import re
+import io
+import os
+import bz2
+import functools
+import gzip
+import lzma
+import mmap
+import queue
+import signal
+import asyncio
+import threading
 import subprocess
+from array import array
+import numpy as np
 
 import sys
 sys.path.append("..")
@@ -16,95 +34,492 @@ from .AbstractMethod import *
 from .EditOperations import *
 
 # Cell
-def readAbstractMethodsFromFile(file: str) -> List[AbstractMethod]:
+#hide
+class _ReadAheadStream(io.RawIOBase):
     """
-    Returns a list of `AbstractMethods` read from the given `file`. The file should have one `AbstractMethod`
-    per line with tokens separated by spaces.
+    A readable binary stream which reads the given binary `stream` in chunks of `chunkSize` bytes in a background
+    thread, holding at most `numChunks` chunks which have not been read yet. Reading a compressed file in this way
+    decompresses the next chunks while the current ones are processed, since the stdlib codecs release the GIL.
+    """
+
+    def __init__(self, stream: io.IOBase, chunkSize: int = 1 << 20, numChunks: int = 4):
+        self.__stream = stream
+        self.__chunks = queue.Queue(numChunks)
+        self.__chunk = memoryview(b"")
+        self.__ended = False
+        self.__closing = threading.Event()
+        self.__thread = threading.Thread(target = self.__readChunks, args = (chunkSize,), daemon = True)
+        self.__thread.start()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+
+        if len(self.__chunk) == 0 and not self.__ended:
+
+            chunk = self.__chunks.get()
+            if isinstance(chunk, BaseException):
+                self.__ended = True
+                raise chunk
+
+            self.__chunk = memoryview(chunk)
+            self.__ended = len(chunk) == 0
+
+        numBytes = min(len(buffer), len(self.__chunk))
+        buffer[:numBytes] = self.__chunk[:numBytes]
+        self.__chunk = self.__chunk[numBytes:]
+
+        return numBytes
+
+    def close(self) -> None:
+
+        if not self.closed:
+            self.__closing.set()
+            self.__thread.join()
+            self.__stream.close()
+
+        super().close()
+
+    def __readChunks(self, chunkSize: int) -> None:
+
+        chunk = b"-"
+
+        while len(chunk) > 0:
+
+            try:
+                chunk = self.__stream.read(chunkSize)
+            except Exception as e:
+                chunk = e
+
+            # wait for a free place for the chunk, unless the stream is closed in the meantime
+            while True:
+                try:
+                    self.__chunks.put(chunk, timeout = 0.1)
+                    break
+                except queue.Full:
+                    if self.__closing.is_set():
+                        return
+
+            if isinstance(chunk, BaseException):
+                return
+
+# Cell
+def openFile(file: str, mode: str = "r", readAhead: bool = False) -> io.TextIOBase:
+    """
+    Opens the given text `file` for reading if `mode` is `"r"`, or for writing if `mode` is `"w"`. Files ending in
+    `".gz"`, `".bz2"` or `".xz"` are decompressed while reading and compressed while writing with the respective
+    codec, such that any of the readers and writers of this module can be used on compressed files. All files are
+    opened with large buffers. If `readAhead`, compressed files are decompressed ahead of the reads in a background
+    thread; this has no effect on uncompressed files or on writing.
     """
 
-    abstractMethods = []
+    if mode not in ("r", "w"):
+        raise ValueError("openFile: invalid mode: {}".format(repr(mode)))
+
+    extension = os.path.splitext(file)[1]
+    if extension not in (".gz", ".bz2", ".xz"):
+        return open(file, mode, buffering = 1 << 20)
+
+    # gzip compresses several times faster at level 6, as in the gzip tool, than at its default level 9, while the
+    # compressed file is hardly larger
+    if extension == ".gz":
+        stream = gzip.GzipFile(file, mode + "b", compresslevel = 6)
+    elif extension == ".bz2":
+        stream = bz2.BZ2File(file, mode + "b")
+    else:
+        stream = lzma.LZMAFile(file, mode + "b")
+    if mode == "r":
+        if readAhead:
+            stream = _ReadAheadStream(stream)
+        stream = io.BufferedReader(stream, 1 << 20)
+    else:
+        stream = io.BufferedWriter(stream, 1 << 20)
+
+    return io.TextIOWrapper(stream)
+
+# Cell
+def iterAbstractMethods(
+    file: str,
+    vocabulary: Optional[TokenVocabulary] = None,
+    readAhead: bool = False
+) -> Iterator[AbstractMethod]:
+    """
+    Returns an iterator over the `AbstractMethods` read from the given `file`, which should have one `AbstractMethod`
+    per line with tokens separated by spaces. The file is read one line at a time, so it does not have to fit in
+    memory. The tokens are stored in the given `vocabulary`, or in the shared one if it is None. The file is opened
+    with `openFile`, so it can be compressed, and `readAhead` is passed on to it.
+    """
 
-    with open(file, "r") as f:
+    with openFile(file, "r", readAhead) as f:
         for line in f:
-            abstractMethods.append(AbstractMethod(line.strip()))
+            yield AbstractMethod(line.strip(), vocabulary = vocabulary)
+
+# Cell
+def readAbstractMethodsFromFile(file: str, readAhead: bool = False) -> List[AbstractMethod]:
+    """
+    Returns a list of `AbstractMethods` read from the given `file`. The file should have one `AbstractMethod`
+    per line with tokens separated by spaces. Use `iterAbstractMethods` to read large files one method at a time.
+    The file can be compressed, see `openFile`, which is given `readAhead`.
+    """
+
+    return list(iterAbstractMethods(file, readAhead = readAhead))
+
+# Cell
+def iterAbstractMethodPairs(
+    sourceFile: str,
+    targetFile: str,
+    readAhead: bool = False
+) -> Iterator[Tuple[AbstractMethod, AbstractMethod]]:
+    """
+    Returns an iterator over the pairs of `AbstractMethods` on the same lines of the given `sourceFile` and
+    `targetFile`, as read by `iterAbstractMethods` with the given `readAhead`. Both files are read in lockstep, one
+    line at a time. Raises a `ValueError` as soon as one of the files ends before the other, i.e. if the number of
+    methods differ.
+    """
+
+    # the source and target methods are None once the respective file has ended
+    sourceMethods = iterAbstractMethods(sourceFile, readAhead = readAhead)
+    targetMethods = iterAbstractMethods(targetFile, readAhead = readAhead)
+    for sourceMethod, targetMethod in zip_longest(sourceMethods, targetMethods):
 
-    return abstractMethods
+        if sourceMethod is None or targetMethod is None:
+            raise ValueError("iterAbstractMethodPairs: number of methods differ in source and target files!")
+
+        yield sourceMethod, targetMethod
 
 # Cell
-def writeAbstractMethodsToFile(file: str, abstractMethods: List[AbstractMethod]) -> None:
+#hide
+def _writeLines(file: str, lines: Iterable[str], batchSize: int = 1024) -> None:
     """
-    Writes the given `abstractMethods` to the given `file` such that one `AbstractMethod` is written per line.
+    Writes the given `lines` to the given `file`, separated by newlines and without a newline after the last one. The
+    lines are joined in batches of `batchSize` lines, such that each batch is written with one large write. The file
+    is opened with `openFile`, so it is compressed if its name ends in the extension of a codec.
     """
 
-    with open(file, "w") as f:
+    lines = iter(lines)
 
-        for i in range(len(abstractMethods)):
+    with openFile(file, "w") as f:
 
-            f.write(str(abstractMethods[i]))
+        batch = list(islice(lines, batchSize))
+        while len(batch) > 0:
 
-            if i < len(abstractMethods) - 1:
+            f.write("\n".join(batch))
+
+            batch = list(islice(lines, batchSize))
+            if len(batch) > 0:
                 f.write("\n")
 
 # Cell
-def readCompoundOperationsFromFile(file: str) -> List[Optional[List[CompoundOperation]]]:
+def writeAbstractMethodsToFile(file: str, abstractMethods: Iterable[AbstractMethod]) -> None:
+    """
+    Writes the given `abstractMethods` to the given `file` such that one `AbstractMethod` is written per line. The
+    methods can be given by any iterable, e.g. the iterator returned by `iterAbstractMethods`, and are written in
+    large batches as they are iterated.
+    """
+
+    _writeLines(file, (str(abstractMethod) for abstractMethod in abstractMethods))
+
+# Cell
+def writeAbstractMethodCorpus(path: str, abstractMethods: Iterable[AbstractMethod]) -> None:
+    """
+    Writes the given `abstractMethods` to a binary corpus which can be memory-mapped by `AbstractMethodCorpus`. The
+    corpus consists of three files:
+
+    - `path + ".ids"`: the token IDs of all methods, one after the other, as unsigned 32-bit integers
+    - `path + ".offsets"`: the offsets of each method into the token IDs, followed by the total number of token IDs,
+      as unsigned 64-bit integers
+    - `path + ".vocab"`: the token of each ID, one per line
+
+    Integers are written in the byte order of this machine.
+    """
+
+    vocabulary = TokenVocabulary()
+    offsets = array("Q", [0])
+
+    with open(path + ".ids", "wb") as f:
+        for method in abstractMethods:
+            tokenIds = vocabulary.getIds(method.getTokens())
+            tokenIds.tofile(f)
+            offsets.append(offsets[-1] + len(tokenIds))
+
+    with open(path + ".offsets", "wb") as f:
+        offsets.tofile(f)
+
+    with open(path + ".vocab", "w", encoding = "utf-8", newline = "") as f:
+        f.write("\n".join(vocabulary.getTokens(range(len(vocabulary)))))
+
+# Cell
+def makeAbstractMethodCorpus(file: str, path: str) -> None:
+    """
+    Converts the given `file` of `AbstractMethods`, as read by `readAbstractMethodsFromFile`, to a binary corpus at
+    the given `path`, as written by `writeAbstractMethodCorpus`. The file is read one line at a time, so it does not
+    have to fit in memory.
+    """
+
+    # use a vocabulary of its own rather than the shared one, so that the tokens can be freed once the corpus is written
+    writeAbstractMethodCorpus(path, iterAbstractMethods(file, vocabulary = TokenVocabulary()))
+
+# Cell
+class AbstractMethodCorpus:
+    """
+    Opens the binary corpus at the given `path`, as written by `writeAbstractMethodCorpus`. The token IDs and offsets
+    are memory-mapped rather than read, and the corpus behaves like a read-only list of `AbstractMethods`:
+
+    - `corpus[i]` returns the `i`th method in constant time, as a view into the memory-mapped token IDs
+    - `corpus[start:stop:step]` returns a sub-corpus in constant time, which shares the memory-mapped files
+    - `len(corpus)` and iterating over the corpus work as for lists
+
+    All methods of a corpus share its vocabulary, so comparing methods of the same corpus does not require any lookups.
+    The methods can be modified without affecting the corpus, as applying edit operations to them copies their tokens.
+    """
+
+    def __init__(self, path: str) -> None:
+
+        with open(path + ".vocab", "r", encoding = "utf-8", newline = "") as f:
+            tokens = f.read()
+
+        self.__vocabulary = TokenVocabulary([] if tokens == "" else tokens.split("\n"))
+        self.__tokenIds = AbstractMethodCorpus.__mapFile(path + ".ids", "I")
+        self.__offsets = AbstractMethodCorpus.__mapFile(path + ".offsets", "Q")
+        self.__indices = range(len(self.__offsets) - 1)
+
+    def __len__(self) -> int:
+        return len(self.__indices)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[AbstractMethod, "AbstractMethodCorpus"]:
+
+        if type(key) is slice:
+            corpus = object.__new__(AbstractMethodCorpus)
+            corpus.__vocabulary = self.__vocabulary
+            corpus.__tokenIds = self.__tokenIds
+            corpus.__offsets = self.__offsets
+            corpus.__indices = self.__indices[key]
+            return corpus
+
+        index = self.__indices[key]
+        begin = self.__offsets[index]
+        end = self.__offsets[index + 1]
+
+        return AbstractMethod.FromTokenIds(self.__tokenIds[begin:end], self.__vocabulary)
+
+    def __iter__(self) -> Iterator[AbstractMethod]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def getVocabulary(self) -> TokenVocabulary:
+        """
+        Returns the `TokenVocabulary` shared by all methods of the corpus.
+        """
+        return self.__vocabulary
+
+    def __mapFile(file: str, typecode: str) -> memoryview:
+
+        with open(file, "rb") as f:
+
+            # empty files cannot be memory-mapped
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(array(typecode))
+
+            buffer = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+
+        return memoryview(buffer).cast(typecode)
+
+# Cell
+def iterCompoundOperations(file: str, readAhead: bool = False) -> Iterator[Optional[List[CompoundOperation]]]:
+    """
+    Returns an iterator over the lists of CompoundOperations read from the given `file`, as in
+    `readCompoundOperationsFromFile`, but reading the file one line at a time, so it does not have to fit in memory.
+    Lines which are unable to be parsed into a list of CompoundOperations are represented by `None`.
+    The file is opened with `openFile`, so it can be compressed, and `readAhead` is passed on to it.
+    """
+
+    with openFile(file, "r", readAhead) as f:
+        for line in f:
+            try:
+                yield CompoundOperation.ListFromMachineString(line)
+            except ValueError:
+                yield None
+
+# Cell
+def readCompoundOperationsFromFile(file: str, readAhead: bool = False) -> List[Optional[List[CompoundOperation]]]:
     """
     Returns a list of lists of CompoundOperations read from the given `file`. Each line in the file represents a
     list of CompoundOperations in machine string format, as in the file written by `writeCompoundOperationsToFile`.
     If a line is unable to be parsed into a list of CompoundOperations, then that list is instead represented by
-    `None`. This is different from an empty list, which represents a line with no CompoundOperations.
+    `None`. This is different from an empty list, which represents a line with no CompoundOperations. Use
+    `iterCompoundOperations` to read large files one line at a time. The file can be compressed, see `openFile`, which
+    is given `readAhead`.
+    """
+
+    return list(iterCompoundOperations(file, readAhead = readAhead))
+
+# Cell
+def writeCompoundOperationsToFile(
+    file: str,
+    operations: Iterable[List[CompoundOperation]],
+    form: str = "general"
+) -> None:
+    """
+    Writes the given lists of CompoundOperations to the given `file` in the machine string form given by `form`
+    (defaults to `"general"`), as given by `CompoundOperation.ListToMachineString`. Each list of operations occupies one
+    line. The lists can be given by any iterable, e.g. the iterator returned by `iterCompoundOperations`, and are
+    written in large batches as they are iterated.
+    """
+
+    _writeLines(file, (CompoundOperation.ListToMachineString(opList, form) for opList in operations))
+
+# Cell
+class LineIndex:
     """
+    Indexes the lines of the given text `file`, such that any line can be read without reading the lines before it:
 
-    operations = []
+    - `index[i]` returns the `i`th line, including its newline, by reading only that line
+    - `index[start:stop:step]` returns a list of the given lines
+    - `len(index)` returns the number of lines, as when iterating over the file
 
-    with open(file, "r") as f:
+    The offsets of the lines are found once and stored next to the file in a sidecar file with the extension `".idx"`,
+    together with the size and modification time of the file. The sidecar is used by later indexes of the file until
+    the file changes, in which case the offsets are found again. If the sidecar cannot be written, the offsets are only
+    kept in memory. The file and its sidecar are memory-mapped, and the file cannot be compressed.
+    """
 
-        for line in f:
+    def __init__(self, file: str) -> None:
+
+        if os.path.splitext(file)[1] in (".gz", ".bz2", ".xz"):
+            raise ValueError("LineIndex: cannot index compressed file: {}".format(repr(file)))
 
-            lineOps = []
+        with open(file, "rb") as f:
 
-            # continue as long as there is stuff left in the line and there hasn't been a parse failure
-            while line != "" and lineOps is not None:
+            stat = os.fstat(f.fileno())
+            self.__offsets = LineIndex.__loadOffsets(file + ".idx", stat)
+            if self.__offsets is None:
+                self.__offsets = LineIndex.__findOffsets(f, stat)
 
-                # match the beginning of the line to the machine string pattern
-                line = line.strip()
-                match = re.search(r"^<.+?>.*?</.+?>", line)
+            # empty files cannot be memory-mapped
+            self.__text = b"" if stat.st_size == 0 else mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
 
-                # if the match succeeded, then attempt to remove the operation from the line and add it to lineOps
-                if match:
-                    try:
-                        lineOps.append(CompoundOperation.FromMachineString(match.group(0)))
-                        line = line[len(match.group(0)):]
-                    except ValueError:
-                        lineOps = None
+    def __len__(self) -> int:
+        return len(self.__offsets) - 1
 
-                # if the match didn't succeed and there is stuff left on the line, then this line is invalid
-                elif line != "":
-                    lineOps = None
+    def __getitem__(self, key: Union[int, slice]) -> Union[str, List[str]]:
 
-            operations.append(lineOps)
+        if type(key) is slice:
+            return [self[i] for i in range(len(self))[key]]
 
-    return operations
+        index = range(len(self))[key]
+        return self.__text[self.__offsets[index] : self.__offsets[index + 1]].decode("utf-8")
+
+    def __loadOffsets(indexFile: str, stat: os.stat_result) -> Optional[memoryview]:
+
+        # the sidecar holds the size and modification time of the file, followed by the offsets of its lines and
+        # its size
+        try:
+            with open(indexFile, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < 24 or size % 8 != 0:
+                    return None
+                buffer = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        except OSError:
+            return None
+
+        offsets = memoryview(buffer).cast("Q")
+        if offsets[0] != stat.st_size or offsets[1] != stat.st_mtime_ns:
+            return None
+
+        return offsets[2:]
+
+    def __findOffsets(f: io.BufferedIOBase, stat: os.stat_result) -> array:
+
+        offsets = array("Q", [0])
+        position = 0
+
+        # every newline starts a line, except one at the end of the file
+        for chunk in iter(lambda: f.read(1 << 24), b""):
+            newlines = np.flatnonzero(np.frombuffer(chunk, dtype = np.uint8) == ord("\n"))
+            offsets.extend((newlines + (position + 1)).tolist())
+            position += len(chunk)
+
+        if offsets[-1] == stat.st_size:
+            offsets.pop()
+        offsets.append(stat.st_size)
+
+        # write the sidecar to a temporary file first, such that other processes never read an incomplete one
+        indexFile = f.name + ".idx"
+        try:
+            with open(indexFile + ".tmp", "wb") as indexF:
+                array("Q", [stat.st_size, stat.st_mtime_ns]).tofile(indexF)
+                offsets.tofile(indexF)
+            os.replace(indexFile + ".tmp", indexFile)
+        except OSError:
+            pass
+
+        return offsets
 
 # Cell
-def writeCompoundOperationsToFile(file: str, operations: List[List[CompoundOperation]], form: str = "general") -> None:
+#hide
+def _getLineIndex(file: str) -> LineIndex:
     """
-    Writes the given list of lists of CompoundOperations to the given `file` in the machine string form given by `form`
-    (defaults to `"general"`). Each list of operations occupies one line.
+    Returns a `LineIndex` of the given `file`, which is kept for later calls until the size or modification time of the
+    file changes, such that reading single lines does not index the file again.
     """
 
-    with open(file, "w") as f:
+    stat = os.stat(file)
+    return _getCachedLineIndex(os.path.abspath(file), stat.st_size, stat.st_mtime_ns)
 
-        for i in range(len(operations)):
 
-            for j in range(len(operations[i])):
+@functools.lru_cache(maxsize = 64)
+def _getCachedLineIndex(file: str, size: int, mtime: int) -> LineIndex:
+    return LineIndex(file)
 
-                f.write(operations[i][j].getMachineString(form))
+# Cell
+def getAbstractMethod(file: str, i: int) -> AbstractMethod:
+    """
+    Returns the `i`th `AbstractMethod` of the given `file`, as read by `readAbstractMethodsFromFile`, without reading
+    the methods before it. The lines of the file are found with a `LineIndex`, which is kept until the file changes.
+    """
 
-                if j < len(operations[i]) - 1:
-                    f.write(" ")
+    return AbstractMethod(_getLineIndex(file)[i].strip())
 
-            if i < len(operations) - 1:
-                f.write("\n")
+# Cell
+def getRange(file: str, start: int, stop: int) -> List[AbstractMethod]:
+    """
+    Returns the `AbstractMethods` of the given `file` from index `start` up to, but not including, index `stop`, as
+    read by `readAbstractMethodsFromFile`, without reading the methods before them. As for slicing lists, negative
+    indices count from the end of the file. The lines of the file are found with a `LineIndex`, which is kept until the
+    file changes.
+    """
+
+    return [AbstractMethod(line.strip()) for line in _getLineIndex(file)[start:stop]]
+
+# Cell
+def getAlignedRow(
+    abstractSourceFile: str,
+    abstractTargetFile: str,
+    editOpsFile: str,
+    i: int
+) -> Tuple[AbstractMethod, AbstractMethod, Optional[List[CompoundOperation]]]:
+    """
+    Returns the `i`th source `AbstractMethod`, target `AbstractMethod` and list of CompoundOperations of the given
+    `abstractSourceFile`, `abstractTargetFile` and `editOpsFile`, as read by `readAbstractMethodsFromFile` and
+    `readCompoundOperationsFromFile`, without reading the lines before them. The lines of each file are found with a
+    `LineIndex`, which is kept until the file changes. Raises a `ValueError` if the files have different numbers of
+    lines.
+    """
+
+    sourceIndex = _getLineIndex(abstractSourceFile)
+    targetIndex = _getLineIndex(abstractTargetFile)
+    editOpsIndex = _getLineIndex(editOpsFile)
+
+    if not len(sourceIndex) == len(targetIndex) == len(editOpsIndex):
+        raise ValueError("getAlignedRow: number of lines differ in the given files!")
+
+    try:
+        operations = CompoundOperation.ListFromMachineString(editOpsIndex[i])
+    except ValueError:
+        operations = None
+
+    return AbstractMethod(sourceIndex[i].strip()), AbstractMethod(targetIndex[i].strip()), operations
 
 # Cell
 #hide
@@ -124,31 +539,241 @@ def getYamlParameter(yamlFile: str, key: str) -> str:
 
 # Cell
 #hide
-def runCommand(command: Iterable[str]) -> str:
+class _CommandOutput:
+    """
+    Handles the lines of output of a command: each line is written to the given `logFile` unless it is None, written
+    to `sys.stdout` if `echo`, and passed to each of the given `callbacks` without its line break. Only the last
+    `maxLines` lines are kept in memory.
+    """
+
+    def __init__(
+        self,
+        logFile: Optional[str],
+        callbacks: Iterable[Callable[[str], None]],
+        maxLines: int,
+        echo: bool
+    ) -> None:
+        self.__logFile = None if logFile is None else open(logFile, "w", buffering = 1)
+        self.__callbacks = list(callbacks)
+        self.__lines = deque(maxlen = maxLines)
+        self.__echo = echo
+
+    def add(self, line: bytes) -> None:
+
+        line = line.decode(errors = "replace")
+        self.__lines.append(line)
+
+        if self.__logFile is not None:
+            self.__logFile.write(line)
+
+        if self.__echo:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+
+        for callback in self.__callbacks:
+            callback(line.rstrip("\r\n"))
+
+    def close(self) -> None:
+        if self.__logFile is not None:
+            self.__logFile.close()
+
+    def getOutput(self) -> str:
+        return "".join(self.__lines)
+
+def _signalCommand(process: Union[subprocess.Popen, asyncio.subprocess.Process], signalNumber: int) -> None:
+    """
+    Sends the given signal to the given `process` of a command and, on POSIX systems, to the processes it started, since
+    commands run by the shell are children of the shell process.
+    """
+
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signalNumber)
+        elif signalNumber == signal.SIGTERM:
+            process.terminate()
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+# Cell
+class RunningCommand:
+    """
+    Runs the given `command` in the shell without blocking. Its output, including its standard error, is read one line
+    at a time in a background thread, where each line is written to the given `logFile` unless it is None, written to
+    `sys.stdout` if `echo`, and passed to each of the given `callbacks` without its line break. Only the last
+    `maxLines` lines of output are kept in memory, so that long running commands do not use more and more memory.
+    The variables in `env` are added to the environment of the command.
+
+    If a callback raises an exception, the command is cancelled and the exception is raised by `wait`.
+    """
+
+    def __init__(
+        self,
+        command: str,
+        logFile: Optional[str] = None,
+        callbacks: Iterable[Callable[[str], None]] = (),
+        maxLines: int = 1000,
+        echo: bool = False,
+        env: Optional[Dict[str, str]] = None
+    ) -> None:
+
+        self.__command = command
+        self.__output = _CommandOutput(logFile, callbacks, maxLines, echo)
+        self.__error = None
+
+        # the command runs in a session of its own, so that it can be cancelled along with the processes it starts
+        self.__process = subprocess.Popen(
+            command,
+            shell = True,
+            stdout = subprocess.PIPE,
+            stderr = subprocess.STDOUT,
+            env = None if env is None else dict(os.environ, **env),
+            start_new_session = os.name == "posix"
+        )
+
+        self.__reader = threading.Thread(target = self.__readOutput, daemon = True)
+        self.__reader.start()
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """
+        Waits until the command has finished and all of its output has been handled, then returns its exit code.
+        Raises a `subprocess.TimeoutExpired` if the command is still running after `timeout` seconds, without
+        cancelling it.
+        """
+
+        try:
+            self.__process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            raise subprocess.TimeoutExpired(self.__command, timeout, self.getOutput()) from None
+
+        self.__reader.join()
+        if self.__error is not None:
+            raise self.__error
+
+        return self.__process.returncode
+
+    def cancel(self) -> None:
+        """
+        Stops the command if it is still running: it is terminated, and killed if it has not stopped five seconds later.
+        """
+
+        if self.__process.poll() is None:
+            _signalCommand(self.__process, signal.SIGTERM)
+            try:
+                self.__process.wait(5)
+            except subprocess.TimeoutExpired:
+                _signalCommand(self.__process, signal.SIGKILL if os.name == "posix" else signal.SIGTERM)
+                self.__process.wait()
+
+        self.__reader.join()
+
+    def isRunning(self) -> bool:
+        """
+        Returns whether the command is still running.
+        """
+        return self.__process.poll() is None
+
+    def getExitCode(self) -> Optional[int]:
+        """
+        Returns the exit code of the command, or None if it is still running.
+        """
+        return self.__process.poll()
+
+    def getOutput(self) -> str:
+        """
+        Returns the last lines of output of the command, at most `maxLines` of them, including their line breaks.
+        """
+        return self.__output.getOutput()
+
+    def __readOutput(self) -> None:
+
+        try:
+            for line in self.__process.stdout:
+                self.__output.add(line)
+        except Exception as e:
+            self.__error = e
+            _signalCommand(self.__process, signal.SIGKILL if os.name == "posix" else signal.SIGTERM)
+        finally:
+            self.__process.stdout.close()
+            self.__output.close()
+
+# Cell
+#hide
+def runCommand(
+    command: str,
+    logFile: Optional[str] = None,
+    callbacks: Iterable[Callable[[str], None]] = (),
+    timeout: Optional[float] = None,
+    maxLines: int = 1000,
+    echo: bool = True
+) -> str:
+    """
+    Runs the given command in the shell and continuously prints its output, as in `RunningCommand`, then returns the
+    last `maxLines` lines of its output once it has finished. The output is also written to the given `logFile` unless
+    it is None, and each line is passed to the given `callbacks`. If the command failed, raises a
+    `subprocess.CalledProcessError`. If it is still running after `timeout` seconds, or if waiting for it is
+    interrupted, the command is cancelled; a timeout raises a `subprocess.TimeoutExpired`.
+    """
+
+    runningCommand = RunningCommand(command, logFile, callbacks, maxLines, echo)
+
+    try:
+        exitCode = runningCommand.wait(timeout)
+    except BaseException:
+        runningCommand.cancel()
+        raise
+
+    if exitCode == 0:
+        return runningCommand.getOutput()
+
+    raise subprocess.CalledProcessError(exitCode, command, runningCommand.getOutput())
+
+# Cell
+#hide
+async def runCommandAsync(
+    command: str,
+    logFile: Optional[str] = None,
+    callbacks: Iterable[Callable[[str], None]] = (),
+    timeout: Optional[float] = None,
+    maxLines: int = 1000,
+    echo: bool = True
+) -> str:
     """
-    Runs the given command in the shell and continuously prints its output. If the command failed, raises
-    a ProcessException. Returns the command output.
+    Runs the given command in the shell like `runCommand`, but as a coroutine which reads the output of the command in
+    the event loop. The command is cancelled if the coroutine is cancelled or if the `timeout` expires.
     """
 
-    # run the command
-    process = subprocess.Popen(command, shell = True, stdout = subprocess.PIPE, stderr = subprocess.STDOUT)
-    output = ""
+    output = _CommandOutput(logFile, callbacks, maxLines, echo)
 
-    while True:
+    try:
 
-        line = process.stdout.readline()
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout = asyncio.subprocess.PIPE,
+            stderr = asyncio.subprocess.STDOUT,
+            start_new_session = os.name == "posix",
+            limit = 1 << 24
+        )
 
-        # break out if the process has finished and there is no more output to print
-        if process.poll() is not None and line == b"":
-            break
+        async def readOutput() -> int:
+            async for line in process.stdout:
+                output.add(line)
+            return await process.wait()
 
-        sys.stdout.write(line)
-        sys.stdout.flush()
-        output += line.decode()
+        try:
+            exitCode = await asyncio.wait_for(readOutput(), timeout)
+        except BaseException as e:
+            _signalCommand(process, signal.SIGKILL if os.name == "posix" else signal.SIGTERM)
+            await process.wait()
+            if isinstance(e, asyncio.TimeoutError):
+                raise subprocess.TimeoutExpired(command, timeout, output.getOutput()) from None
+            raise
 
-    exitCode = process.returncode
+    finally:
+        output.close()
 
     if exitCode == 0:
-        return output
+        return output.getOutput()
 
-    raise subprocess.CalledProcessError(exitCode, command, output)
\ No newline at end of file
+    raise subprocess.CalledProcessError(exitCode, command, output.getOutput())
\ No newline at end of file
@@ -0,0 +1,381 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: nbs/08_TranslationServer.ipynb (unless otherwise specified).
+
+__all__ = ['TranslationServer', 'TranslationClient']
+
+# Cell
+#hide
+from typing import Any, Union, List, Optional, Dict
+import os
+import json
+import time
+import queue
+import threading
+import http.client
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import sys
+sys.path.append("..")
+
+from .AbstractMethod import *
+from .IOUtils import *
+from .HephaestusModel import *
+
+# Cell
+#hide
+class _TranslationRequest:
+    """
+    Methods to be translated by a `_TranslationBatcher` with the given keyword arguments of `HephaestusModel.translate`,
+    along with their fixed methods or the error raised while translating them once the batch is done.
+    """
+
+    def __init__(self, methods: List[AbstractMethod], options: Dict[str, Any]) -> None:
+        self.methods = methods
+        self.options = options
+        self.fixedMethods = None
+        self.error = None
+        self.done = threading.Event()
+
+# Cell
+#hide
+class _TranslationBatcher:
+    """
+    Translates the requests for a single `model` in a background thread, which also keeps the model from translating
+    several batches at once. Requests which arrive within `maxWait` seconds of the first request of a batch are added
+    to the batch, until it contains at least `maxBatchSize` methods.
+    """
+
+    def __init__(self, model: HephaestusModel, maxBatchSize: int, maxWait: float) -> None:
+
+        self.__model = model
+        self.__maxBatchSize = maxBatchSize
+        self.__maxWait = maxWait
+        self.__requests = queue.Queue()
+        self.__thread = threading.Thread(target = self.__run, daemon = True)
+        self.__thread.start()
+
+    def translate(self, methods: List[AbstractMethod], options: Dict[str, Any]) -> List[Optional[AbstractMethod]]:
+        """
+        Waits until the given `methods` are translated as part of a batch, with the given keyword arguments of
+        `HephaestusModel.translate`, and returns the fixed methods. Raises the error which was raised while translating
+        the batch, if any.
+        """
+
+        if len(methods) == 0:
+            return []
+
+        request = _TranslationRequest(methods, options)
+        self.__requests.put(request)
+        request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+
+        return request.fixedMethods
+
+    def close(self) -> None:
+        """
+        Stops the background thread once the pending requests are translated.
+        """
+
+        self.__requests.put(None)
+        self.__thread.join()
+
+    def __run(self) -> None:
+
+        closing = False
+        while not closing:
+
+            request = self.__requests.get()
+            if request is None:
+                break
+
+            # collect requests until the batch is full or the first request has waited long enough
+            batch = [request]
+            batchSize = len(request.methods)
+            deadline = time.monotonic() + self.__maxWait
+
+            while batchSize < self.__maxBatchSize:
+                try:
+                    request = self.__requests.get(timeout = max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if request is None:
+                    closing = True
+                    break
+                batch.append(request)
+                batchSize += len(request.methods)
+
+            # requests can only be translated together if they have the same options, which may be any JSON values
+            groups = {}
+            for request in batch:
+                groups.setdefault(json.dumps(request.options, sort_keys = True), []).append(request)
+
+            for requests in groups.values():
+                self.__translateRequests(requests, requests[0].options)
+
+    def __translateRequests(
+        self,
+        requests: List[_TranslationRequest],
+        options: Dict[str, Any]
+    ) -> None:
+
+        try:
+            methods = [method for request in requests for method in request.methods]
+            fixedMethods = self.__model.translate(methods, **options)
+
+            start = 0
+            for request in requests:
+                request.fixedMethods = fixedMethods[start : start + len(request.methods)]
+                start += len(request.methods)
+
+        except Exception as e:
+            for request in requests:
+                request.error = e
+
+        for request in requests:
+            request.done.set()
+
+# Cell
+#hide
+class _TranslationHTTPServer(ThreadingMixIn, HTTPServer):
+    """
+    Handles each request in a new thread, such that requests can wait for their batch concurrently. The `batchers`
+    translate the requests for each served model directory.
+    """
+
+    daemon_threads = True
+    # many clients connect at once, which would overflow the default backlog of 5 connections
+    request_queue_size = 1024
+
+    def __init__(self, port: int, batchers: Dict[str, _TranslationBatcher]) -> None:
+        super().__init__(("127.0.0.1", port), _TranslationRequestHandler)
+        self.batchers = batchers
+
+class _TranslationRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles the `POST /translate` requests of `TranslationClient`s. The request body is a JSON object with the
+    `model` directory, the `methods` as lists of tokens, and the other arguments of `TranslationClient.translate`
+    by name. The response body is a JSON object with the fixed `methods` as lists of tokens or null, or with the
+    `error` type and `message`. Invalid requests are answered with status 400, and failed translations with status 500.
+
+    Requests must have the JSON content type, which a web page can't send to another origin without permission, and
+    the model file must be inside the model directory, since it is loaded by torch and passed to `onmt_translate`.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # the arguments of HephaestusModel.translate which are given by the client
+    __OPTIONS = ("modelFile", "applyEditOperations", "workers", "batchSize", "batchType")
+
+    def do_POST(self) -> None:
+
+        if self.path != "/translate":
+            self.__respond(404, {"error": "ValueError", "message": "unknown path {}".format(repr(self.path))})
+            return
+
+        contentType = self.headers.get("Content-Type", "").split(";")[0].strip()
+        if contentType != "application/json":
+            message = "unsupported content type {}".format(repr(contentType))
+            self.__respond(415, {"error": "ValueError", "message": message})
+            return
+
+        # the request is invalid if it can't be read, or asks for a model or model file which is not served
+        try:
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            modelDir = os.path.normpath(request["model"])
+            batcher = self.server.batchers.get(modelDir)
+            if batcher is None:
+                raise ValueError("TranslationServer: model is not served -- {}".format(request["model"]))
+
+            modelFile = request["modelFile"]
+            if modelFile is not None:
+                realModelDir = os.path.realpath(modelDir)
+                if os.path.commonpath([realModelDir, os.path.realpath(modelFile)]) != realModelDir:
+                    raise ValueError(
+                        "TranslationServer: model file is not in the model directory -- {}".format(modelFile)
+                    )
+
+            methods = [AbstractMethod(tokens) for tokens in request["methods"]]
+            options = {name: request[name] for name in _TranslationRequestHandler.__OPTIONS}
+
+        except (ValueError, KeyError, TypeError) as e:
+            self.__respond(400, {"error": type(e).__name__, "message": str(e)})
+            return
+
+        try:
+            fixedMethods = batcher.translate(methods, options)
+        except Exception as e:
+            self.__respond(500, {"error": type(e).__name__, "message": str(e)})
+            return
+
+        self.__respond(200, {"methods": [None if method is None else method.getTokens() for method in fixedMethods]})
+
+    def log_message(self, format: str, *args) -> None:
+        # requests are not logged since there are far too many of them
+        pass
+
+    def __respond(self, status: int, body: dict) -> None:
+
+        # the body of a rejected request may not have been read, so the connection can't be used for another request
+        if status != 200:
+            self.close_connection = True
+
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+# Cell
+class TranslationServer:
+    """
+    Serves translations by the `HephaestusModel`s in the given `modelDirs` over HTTP on localhost, such that each
+    model is only loaded once. Requests for the same model which arrive at about the same time are translated together
+    in a single batch. Use a `TranslationClient` to request translations.
+
+    Required args:
+    - `modelDirs`: The directories of the models to serve; a `TranslationClient` requests a model by its directory
+
+    Optional args:
+    - `port`: The port to listen on. Defaults to 0, which picks a free port; see `getPort`.
+    - `maxBatchSize`: The number of methods after which a batch is translated without waiting for more requests.
+      Defaults to 64.
+    - `maxWait`: The number of seconds which the first request of a batch waits for more requests. Defaults to 0.01.
+    - `loadTranslators`: If True, the model of each directory is loaded with `HephaestusModel.loadTranslator` rather
+      than running `onmt_translate` for every batch. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        modelDirs: List[str],
+        port: int = 0,
+        maxBatchSize: int = 64,
+        maxWait: float = 0.01,
+        loadTranslators: bool = True
+    ) -> None:
+
+        if maxBatchSize < 1:
+            raise ValueError("TranslationServer: maxBatchSize must be at least 1, got {}".format(repr(maxBatchSize)))
+        if maxWait < 0:
+            raise ValueError("TranslationServer: maxWait must not be negative, got {}".format(repr(maxWait)))
+
+        models = {os.path.normpath(modelDir): HephaestusModel(modelDir) for modelDir in modelDirs}
+        if loadTranslators:
+            for model in models.values():
+                model.loadTranslator()
+
+        self.__httpServer = _TranslationHTTPServer(port, {
+            modelDir: _TranslationBatcher(model, maxBatchSize, maxWait) for modelDir, model in models.items()
+        })
+        self.__thread = None
+
+    def getPort(self) -> int:
+        """
+        Returns the port which the server listens on.
+        """
+
+        return self.__httpServer.server_address[1]
+
+    def start(self) -> None:
+        """
+        Starts serving requests in a background thread.
+        """
+
+        if self.__thread is None:
+            self.__thread = threading.Thread(target = self.__httpServer.serve_forever, daemon = True)
+            self.__thread.start()
+
+    def serveForever(self) -> None:
+        """
+        Serves requests in this thread until the process is interrupted, then stops the server.
+        """
+
+        try:
+            self.__httpServer.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """
+        Stops serving requests, and frees the models once their pending requests are translated.
+        """
+
+        if self.__thread is not None:
+            self.__httpServer.shutdown()
+            self.__thread.join()
+            self.__thread = None
+
+        self.__httpServer.server_close()
+        for batcher in self.__httpServer.batchers.values():
+            batcher.close()
+        self.__httpServer.batchers = {}
+
+# Cell
+class TranslationClient:
+    """
+    Requests translations by the model in `modelDir` from a `TranslationServer` on localhost, as if the model was
+    used directly.
+
+    Required args:
+    - `modelDir`: The directory of the model, as given to the server
+    - `port`: The port which the server listens on
+
+    Optional args:
+    - `timeout`: The number of seconds to wait for a translation. Defaults to None, which waits indefinitely.
+    """
+
+    # errors raised by the server which are raised again by the client, any other error is raised as a RuntimeError
+    __ERRORS = {error.__name__: error for error in (ValueError, FileNotFoundError, RuntimeError)}
+
+    def __init__(self, modelDir: str, port: int, timeout: Optional[float] = None) -> None:
+        self.__modelDir = modelDir
+        self.__port = port
+        self.__timeout = timeout
+
+    def translate(
+        self,
+        buggy: Union[str, AbstractMethod, List[AbstractMethod]],
+        modelFile: str = None,
+        applyEditOperations: bool = True,
+        workers: Optional[int] = 1,
+        batchSize: int = 30,
+        batchType: str = "sents"
+    ) -> Union[Optional[AbstractMethod], List[Optional[AbstractMethod]]]:
+        """
+        Translates buggy AbstractMethods with the served model, and returns the same as `HephaestusModel.translate`.
+        The arguments are the same as those of `HephaestusModel.translate`; note that `modelFile` is opened by the
+        server and must be inside the model directory, while the file of `buggy` methods is read by the client. The
+        methods are translated along with those of other requests with the same arguments.
+        """
+
+        inputMethods = []
+        if type(buggy) in (AbstractMethod, list):
+            inputMethods = buggy if type(buggy) is list else [buggy]
+        else:
+            inputMethods = readAbstractMethodsFromFile(buggy)
+
+        body = json.dumps({
+            "model": self.__modelDir,
+            "methods": [method.getTokens() for method in inputMethods],
+            "modelFile": modelFile,
+            "applyEditOperations": applyEditOperations,
+            "workers": workers,
+            "batchSize": batchSize,
+            "batchType": batchType
+        })
+
+        connection = http.client.HTTPConnection("127.0.0.1", self.__port, timeout = self.__timeout)
+        try:
+            connection.request("POST", "/translate", body, {"Content-Type": "application/json"})
+            response = json.loads(connection.getresponse().read())
+        finally:
+            connection.close()
+
+        if "error" in response:
+            raise TranslationClient.__ERRORS.get(response["error"], RuntimeError)(response["message"])
+
+        fixedMethods = [None if tokens is None else AbstractMethod(tokens) for tokens in response["methods"]]
+        return fixedMethods if type(buggy) is not AbstractMethod else fixedMethods[0]
\ No newline at end of file
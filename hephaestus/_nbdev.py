@@ -10,13 +10,32 @@ index = {"InsertOperation": "00_EditOperations.ipynb",
          "getCondensedBasic": "01_CondenseEditOperations.ipynb",
          "getCondensedLoose": "01_CondenseEditOperations.ipynb",
          "getCondensedStrict": "01_CondenseEditOperations.ipynb",
+         "getCondensedWindowed": "01_CondenseEditOperations.ipynb",
+         "TokenVocabulary": "02_AbstractMethod.ipynb",
+         "SHARED_VOCABULARY": "02_AbstractMethod.ipynb",
          "AbstractMethod": "02_AbstractMethod.ipynb",
+         "EditScript": "02_AbstractMethod.ipynb",
+         "EditScriptTable": "02_AbstractMethod.ipynb",
+         "openFile": "03_IOUtils.ipynb",
+         "iterAbstractMethods": "03_IOUtils.ipynb",
          "readAbstractMethodsFromFile": "03_IOUtils.ipynb",
+         "iterAbstractMethodPairs": "03_IOUtils.ipynb",
          "writeAbstractMethodsToFile": "03_IOUtils.ipynb",
+         "writeAbstractMethodCorpus": "03_IOUtils.ipynb",
+         "makeAbstractMethodCorpus": "03_IOUtils.ipynb",
+         "AbstractMethodCorpus": "03_IOUtils.ipynb",
+         "iterCompoundOperations": "03_IOUtils.ipynb",
          "readCompoundOperationsFromFile": "03_IOUtils.ipynb",
          "writeCompoundOperationsToFile": "03_IOUtils.ipynb",
+         "LineIndex": "03_IOUtils.ipynb",
+         "getAbstractMethod": "03_IOUtils.ipynb",
+         "getRange": "03_IOUtils.ipynb",
+         "getAlignedRow": "03_IOUtils.ipynb",
          "getYamlParameter": "03_IOUtils.ipynb",
+         "RunningCommand": "03_IOUtils.ipynb",
          "runCommand": "03_IOUtils.ipynb",
+         "runCommandAsync": "03_IOUtils.ipynb",
+         "makeEditOpsFiles": "04_DatasetConstruction.ipynb",
          "makeEditOpsFile": "04_DatasetConstruction.ipynb",
          "DATA_SMALL_METHODS_TRAIN_BUGGY": "04_DatasetConstruction.ipynb",
          "DATA_SMALL_METHODS_TRAIN_FIXED": "04_DatasetConstruction.ipynb",
@@ -36,6 +55,7 @@ index = {"InsertOperation": "00_EditOperations.ipynb",
          "DATA_SMALL_OPS_TYPED_STRICT_VALID": "04_DatasetConstruction.ipynb",
          "DATA_SMALL_OPS_TYPED_LOOSE_TRAIN": "04_DatasetConstruction.ipynb",
          "DATA_SMALL_OPS_TYPED_LOOSE_VALID": "04_DatasetConstruction.ipynb",
+         "TranslationCache": "05_HephaestusModel.ipynb",
          "HephaestusModel": "05_HephaestusModel.ipynb",
          "MODEL_BASE_DIR": "06_TrainModels.ipynb",
          "DEFAULT_PARAMS_DIR": "06_TrainModels.ipynb",
@@ -61,7 +81,9 @@ index = {"InsertOperation": "00_EditOperations.ipynb",
          "plotAllPerfectPredictionAccuracies": "07_Experiment.ipynb",
          "plotAvgEditDistDecreases": "07_Experiment.ipynb",
          "plotAllAvgEditDistDecreases": "07_Experiment.ipynb",
-         "plotFailedPredictionRates": "07_Experiment.ipynb"}
+         "plotFailedPredictionRates": "07_Experiment.ipynb",
+         "TranslationServer": "08_TranslationServer.ipynb",
+         "TranslationClient": "08_TranslationServer.ipynb"}
 
 modules = ["EditOperations.py",
            "CondenseEditOperations.py",
@@ -70,7 +92,8 @@ modules = ["EditOperations.py",
            "DatasetConstruction.py",
            "HephaestusModel.py",
            "TrainModels.py",
-           "Experiment.py"]
+           "Experiment.py",
+           "TranslationServer.py"]
 
 doc_url = "https://WM-SEMERU.github.io/hephaestus/"
 